@@ -1,19 +1,23 @@
+import os
+
 import requests
 
+from art_client import ARTIC_API, ArtClient
+
+
 def main():
     print("Search")
     artist = input("Artist: ")
 
-    try:
-        response = requests.get(
-            "https://api.artic.edu/api/v1/artworks",
-            {"q": artist}
-        )
-    except requests.HTTPError:
-        print("Net Problem")
+    # ARTIC_API points the client at a local stand-in server for testing
+    with ArtClient(os.environ.get("ARTIC_API", ARTIC_API)) as client:
+        try:
+            artworks = client.search_artworks(artist)
+        except (requests.RequestException, ValueError, KeyError):
+            print("Net Problem")
+            return
 
-    content = response.json()
-    for artwork in content["data"]:
+    for artwork in artworks:
         print(f"* {artwork['title']}")
 
-main()
\ No newline at end of file
+main()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ARTIC_API = "https://api.artic.edu/api/v1"
+
+
+class ResponseCache:
+    """JSON responses on disk, one file per request, with a memo in front
+
+    Entries keep the body, the ETag and when they were last confirmed, so a
+    stale entry can be revalidated with If-None-Match instead of refetched.
+    """
+
+    def __init__(self, directory=".artic_cache", ttl=3600):
+        self.directory = directory
+        self.ttl = ttl
+        self.memo = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, url, params):
+        raw = json.dumps([url, sorted((params or {}).items())], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        entry = self.memo.get(key)
+        if entry is None:
+            try:
+                with open(self.path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            self.memo[key] = entry
+        return entry
+
+    def fresh(self, entry, now=None):
+        return (now or time.time()) - entry["checked"] < self.ttl
+
+    def put(self, key, body, etag=None):
+        entry = {"checked": time.time(), "etag": etag, "body": body}
+        self.write(key, entry)
+        return entry
+
+    def touch(self, key, entry):
+        """The server said 304: the body is good for another ttl"""
+        entry["checked"] = time.time()
+        self.write(key, entry)
+
+    def write(self, key, entry):
+        self.memo[key] = entry
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class ArtClient:
+    """Art Institute of Chicago API client: pooled session, disk cache, retries
+
+    base_url can point at a local stand-in server. Connections are kept alive
+    in a bounded pool; GETs that fail to connect or come back 429/5xx are
+    retried with exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, base_url=ARTIC_API, cache=None, timeout=(3.05, 10), retries=3, backoff=0.5,
+                 pool_size=4, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else ResponseCache()
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/json"
+
+    def get_json(self, path, params=None):
+        """GET base_url/path as JSON, from the cache while it's fresh
+
+        A stale entry is revalidated with its ETag. If the server can't be
+        reached, a stale entry is still better than nothing and is returned.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        key = self.cache.key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.fresh(entry):
+            return entry["body"]
+
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry is not None:
+                self.cache.touch(key, entry)
+                return entry["body"]
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError):
+            if entry is not None:
+                return entry["body"]
+            raise
+        self.cache.put(key, body, response.headers.get("ETag"))
+        return body
+
+    def search_artworks(self, query, fields=("id", "title")):
+        """Artworks matching query, trimmed to the fields we show"""
+        content = self.get_json("artworks", {"q": query, "fields": ",".join(fields)})
+        return content["data"]
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+# Benchmarks never touch the GUI: stub the backends before anything can import them
+for name in ('pyautogui', 'pyperclip'):
+    sys.modules.setdefault(name, types.ModuleType(name))
+
+from bot_logging import start_logging
+from bot_runtime import MemorySink, SimulatedClock
+from enhanced_quote_bot import QuoteBot
+from quote_corpus import write_corpus
+
+DEFAULT_SIZES = "1e3,1e4,1e5"
+
+
+def synthetic_quotes(n):
+    words = ("fate", "power", "truth", "dream", "fear", "hope", "world", "shadow", "light", "war")
+    for i in range(n):
+        yield (f"{words[i % 10]} is the {words[i // 10 % 10]} of every {words[i // 100 % 10]} #{i}"
+               f" - Author {i % 997}")
+
+
+def make_bot(workdir, size):
+    """A bot over a synthetic corpus of size quotes, in its own directory"""
+    os.chdir(workdir)
+    if not os.path.exists('quotes.corpus'):
+        with open('config.json', 'w') as f:
+            json.dump({"log_messages": False, "print_messages": False, "metrics_file": None,
+                       "quote_seed": 1, "journal_compact_bytes": 1 << 40}, f)
+        write_corpus(synthetic_quotes(size), 'quotes')
+    return QuoteBot('config.json', clock=SimulatedClock(), sink=MemorySink())
+
+
+def measure(operation, ops):
+    """Run operation ops times; ops/sec plus p50/p99 latency of single calls"""
+    timings = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for _ in range(ops):
+        t = clock()
+        operation()
+        timings.append(clock() - t)
+    elapsed = (clock() - started) / 1e9
+    timings.sort()
+    return {
+        "ops_per_sec": ops / elapsed if elapsed else 0.0,
+        "p50_us": timings[len(timings) // 2] / 1000,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000,
+    }
+
+
+def peak_memory(operation, ops):
+    """Peak bytes allocated while running operation ops times"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(ops):
+        operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def bench_size(size, ops):
+    results = {}
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            bot = make_bot(workdir, size)
+            base = bot.config.message_prefix + bot.quotes[0]
+
+            cases = {
+                "get_random_quote": (bot.get_random_quote, ops),
+                "generate_spam_message": (lambda: bot.generate_spam_message(base), ops),
+                "load_quotes": (lambda: make_bot(workdir, size), max(ops // 100, 5)),
+                # The journaled write of add_quote, without its printing and duplicate
+                # check; each add is fsync'd, so keep the count low
+                "add_quote": (lambda: bot.quotes.append("benchmark quote - Bench"), max(ops // 100, 5)),
+            }
+
+            logger, listener = start_logging('quote_bot_bench', log_file='bench.log', console=False)
+            cases["log_message"] = (lambda: logger.info("Sent message 1/100: benchmark"), ops)
+
+            for name, (operation, count) in cases.items():
+                result = measure(operation, count)
+                result["peak_bytes"] = peak_memory(operation, max(count // 10, 1))
+                results[name] = result
+            listener.stop()
+            bot.quotes.close()
+        finally:
+            os.chdir(original_dir)
+    return results
+
+
+def run(sizes, ops):
+    results = {}
+    for size in sizes:
+        print(f"Benchmarking {size} quotes...")
+        results[str(size)] = bench_size(size, ops)
+        for name, result in results[str(size)].items():
+            print(f"  {name:22} {result['ops_per_sec']:>12,.0f} ops/s  p50 {result['p50_us']:8.1f}us  "
+                  f"p99 {result['p99_us']:8.1f}us  peak {result['peak_bytes'] / 1024:8.1f}KiB")
+    return {"python": sys.version.split()[0], "ops": ops, "results": results}
+
+
+# Commands that must start fast and never import a GUI library
+COLD_START_COMMANDS = [
+    ["show-config"],
+    ["set-mode", "normal"],
+    ["add-quote", "Cold start benchmark - Bench", "--no-duplicate-check"],
+    ["dry-run", "burst", "--timeline", "cold_start.jsonl"],
+]
+GUI_CHECK = ("import runpy, sys; sys.argv = {argv!r}; runpy.run_path({script!r}, run_name='__main__'); "
+             "loaded = [m for m in ('pyautogui', 'pyperclip', 'customtkinter') if m in sys.modules]; "
+             "sys.exit('GUI modules imported: ' + ', '.join(loaded) if loaded else 0)")
+
+
+def cold_start(runs, budget_ms):
+    """Median wall time of each CLI command in a fresh interpreter; failures listed"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(repo, 'enhanced_quote_bot.py')
+    env = {**os.environ, "PYTHONPATH": repo}
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for command in COLD_START_COMMANDS:
+            argv = [script] + command
+            code = GUI_CHECK.format(argv=argv, script=script)
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                result = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env,
+                                        capture_output=True, text=True)
+                timings.append((time.perf_counter() - started) * 1000)
+                if result.returncode:
+                    failures.append(f"{' '.join(command)}: {result.stderr.strip().splitlines()[-1]}")
+                    break
+            timings.sort()
+            median = timings[len(timings) // 2]
+            print(f"  {' '.join(command):60} {median:8.1f}ms")
+            if median > budget_ms:
+                failures.append(f"{' '.join(command)}: {median:.1f}ms is over the {budget_ms}ms budget")
+    return failures
+
+
+def compare(baseline, current, tolerance):
+    """Regressions beyond tolerance (0.1 = 10%) between two result files"""
+    regressions = []
+    for size, cases in baseline["results"].items():
+        for name, old in cases.items():
+            new = current["results"].get(size, {}).get(name)
+            if new is None:
+                continue
+            if new["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+                regressions.append(f"{size} {name}: ops/s {old['ops_per_sec']:,.0f} -> {new['ops_per_sec']:,.0f}")
+            for metric in ("p99_us", "peak_bytes"):
+                if new[metric] > old[metric] * (1 + tolerance):
+                    regressions.append(f"{size} {name}: {metric} {old[metric]:,.1f} -> {new[metric]:,.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark QuoteBot hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="corpus sizes, e.g. 1e3,1e5,1e7")
+    run_parser.add_argument("--ops", type=int, default=10000, help="operations per case")
+    run_parser.add_argument("--output", help="save results as JSON (e.g. a baseline)")
+
+    compare_parser = commands.add_parser("compare", help="fail if current regressed from baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1)
+
+    cold_parser = commands.add_parser("cold-start", help="time CLI commands in fresh interpreters")
+    cold_parser.add_argument("--runs", type=int, default=5)
+    cold_parser.add_argument("--budget-ms", type=float, default=300)
+
+    args = parser.parse_args()
+    if args.command == "cold-start":
+        failures = cold_start(args.runs, args.budget_ms)
+        for failure in failures:
+            print(f"FAILED {failure}")
+        if failures:
+            sys.exit(1)
+    elif args.command == "run":
+        sizes = [int(float(size)) for size in args.sizes.split(",")]
+        results = run(sizes, args.ops)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Saved results to {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import dataclasses
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from bot_runtime import SINKS
+
+TEST_MODES = ('normal', 'burst', 'flood', 'pattern', 'mixed')
+
+
+@dataclass(frozen=True)
+class BotConfig:
+    """Every QuoteBot setting with its default; the single source of truth"""
+    message_prefix: str = ">>> "
+    min_delay: float = 2
+    max_delay: float = 5
+    initial_delay: float = 2
+    max_messages: int = 100
+    avoid_repeats: bool = True
+    log_messages: bool = True
+    test_mode: str = "normal"  # normal, burst, flood, pattern, mixed
+    burst_count: int = 5
+    burst_delay: float = 0.1
+    flood_rate: float = 0.5
+    pattern_repeat: int = 3
+    similar_message_chance: float = 0.3
+    caps_chance: float = 0.2
+    spam_words_chance: float = 0.1
+    quote_seed: Optional[int] = None  # set an int for reproducible quote order
+    journal_compact_bytes: int = 1048576
+    duplicate_threshold: float = 0.4
+    log_file: str = "quote_bot.log"
+    log_max_bytes: int = 5242880
+    log_backup_count: int = 3
+    print_messages: bool = True
+    metrics_file: Optional[str] = "quote_bot_metrics.json"  # use a .prom name for Prometheus text
+    metrics_interval: float = 60
+    send_backend: str = "gui"  # gui, memory, stdout or module:Class
+    # Weighted picks replace avoid_repeats when any of these is set
+    author_weight_power: float = 0.0  # 1 gives every author the same total share
+    author_weights: dict = dataclasses.field(default_factory=dict)  # e.g. {"Guts": 0.5}
+    recency_penalty: float = 0.0  # 1 never repeats a quote within recency_window picks
+    recency_window: int = 50
+    used_quotes_file: Optional[str] = "quotes.used"  # None keeps the no-repeat cycle in memory only
+
+    def as_dict(self):
+        return dataclasses.asdict(self)
+
+    def replace(self, **changes):
+        """A validated copy with some settings changed"""
+        config, errors = validate({**self.as_dict(), **changes})
+        if errors:
+            raise ValueError("; ".join(errors))
+        return config
+
+
+FIELDS = {field.name: field for field in dataclasses.fields(BotConfig)}
+CHANCES = ('similar_message_chance', 'caps_chance', 'spam_words_chance', 'duplicate_threshold',
+           'recency_penalty')
+
+
+def coerce(field, value):
+    """Convert a JSON value to the field's type, or raise ValueError"""
+    kind = field.type
+    if kind == Optional[int] or kind == Optional[str]:
+        if value is None:
+            return None
+        kind = int if kind == Optional[int] else str
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+    elif kind is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif kind is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif kind is str:
+        if isinstance(value, str):
+            return value
+    elif kind is dict:
+        if isinstance(value, dict) and all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0 for v in value.values()):
+            return {str(k): float(v) for k, v in value.items()}
+        raise ValueError(f"{field.name} must map names to non-negative numbers, got {value!r}")
+    raise ValueError(f"{field.name} must be {getattr(kind, '__name__', kind)}, got {value!r}")
+
+
+def validate(data):
+    """Build a BotConfig from a dict; invalid values fall back to their defaults
+
+    Returns the config and a list of problems found, one message per problem.
+    """
+    values = {}
+    errors = []
+    for key in data:
+        if key not in FIELDS:
+            errors.append(f"ignoring unknown key {key!r}")
+    for name, field in FIELDS.items():
+        if name not in data:
+            continue
+        try:
+            value = coerce(field, data[name])
+        except ValueError as e:
+            errors.append(f"{e}; using default")
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+            errors.append(f"{name} must not be negative; using default")
+            continue
+        if name in CHANCES and value > 1:
+            errors.append(f"{name} must be between 0 and 1; using default")
+            continue
+        values[name] = value
+
+    if values.get('test_mode', 'normal') not in TEST_MODES:
+        errors.append(f"test_mode must be one of {', '.join(TEST_MODES)}; using default")
+        values.pop('test_mode')
+    backend = values.get('send_backend', 'gui')
+    if backend not in SINKS and ':' not in backend:
+        errors.append(f"send_backend must be one of {', '.join(SINKS)} or module:Class; using default")
+        values.pop('send_backend')
+    min_delay = values.get('min_delay', BotConfig.min_delay)
+    max_delay = values.get('max_delay', BotConfig.max_delay)
+    if min_delay > max_delay:
+        errors.append("min_delay must not be larger than max_delay; using defaults")
+        values.pop('min_delay', None)
+        values.pop('max_delay', None)
+    return BotConfig(**values), errors
+
+
+def parse_value(name, text):
+    """Parse a value typed at the menu for the given setting"""
+    kind = FIELDS[name].type
+    if text.lower() in ('none', 'null') and kind in (Optional[int], Optional[str]):
+        return None
+    if kind is bool:
+        return text.lower() in ['true', '1', 'yes', 'on']
+    if kind in (int, Optional[int]):
+        return int(text)
+    if kind is float:
+        return float(text)
+    if kind is dict:
+        return json.loads(text)
+    return text
+
+
+class ConfigFile:
+    """config.json loaded once, reloaded when its mtime changes, saved atomically"""
+
+    def __init__(self, path='config.json', check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.config = BotConfig()
+        self.mtime = None
+        self.last_check = 0.0
+
+    def load(self, reloading=False):
+        if not os.path.exists(self.path):
+            self.save(BotConfig())
+            return self.config
+        mtime = os.stat(self.path).st_mtime_ns
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            self.mtime = mtime
+            # Half-saved edits shouldn't reset a running bot to defaults
+            if reloading:
+                print(f"Error reading {self.path}, keeping current settings")
+                return self.config
+            print(f"Error reading {self.path}, using defaults")
+            data = {}
+        self.mtime = mtime
+        self.config, errors = validate(data)
+        for error in errors:
+            print(f"{self.path}: {error}")
+        return self.config
+
+    def current(self):
+        """The latest config; stat()s the file at most once per check_interval"""
+        now = time.monotonic()
+        if now - self.last_check >= self.check_interval:
+            self.last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = self.mtime
+            if mtime != self.mtime:
+                self.load(reloading=True)
+        return self.config
+
+    def save(self, config):
+        """Write through a temp file and rename so readers never see half a file"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(config.as_dict(), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.config = config
+        self.mtime = os.stat(self.path).st_mtime_ns
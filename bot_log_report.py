@@ -0,0 +1,365 @@
+import argparse
+import calendar
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from bot_metrics import LatencyHistogram
+
+# Lines as written by bot_logging.LOG_FORMAT, parsed as bytes so nothing is
+# decoded unless it ends up in the report
+LINE = re.compile(rb'(\d{4}-\d\d-\d\d \d\d:\d\d):(\d\d),(\d{3}) - ([A-Z]+) - (.*?)\r?\n?$')
+MESSAGE = re.compile(rb'(Sent|Burst|Flood|Pattern|Mixed) message (\d+)')
+STARTED = re.compile(rb'Bot started in (\w+) mode')
+STOPPED = re.compile(rb'Bot stopped: (\w+)')
+ROTATED = re.compile(r'\.(\d+)(\.gz)?$')
+KIND_MODES = {b'Sent': 'normal', b'Burst': 'burst', b'Flood': 'flood', b'Pattern': 'pattern', b'Mixed': 'mixed'}
+ERROR_KINDS = ((b'Error sending message', 'send'), (b'Error writing metrics', 'metrics'), (b'Bot error', 'bot'))
+CHUNK_BYTES = 64 * 1024 * 1024
+MAX_ERROR_SAMPLES = 10
+
+
+class Run:
+    """One bot run: from a start line, or as far as the log shows it"""
+
+    def __init__(self, mode=None, explicit=False):
+        self.mode = mode
+        self.explicit = explicit
+        self.start = self.end = None
+        self.messages = 0
+        self.errors = 0
+        self.stop = None
+        self.closed = False
+        self.minutes = Counter()
+        self.first_counter = self.last_counter = None
+        self.first_message = self.last_message = None
+
+    def seen(self, t):
+        if self.start is None:
+            self.start = t
+        self.end = t
+
+    def absorb(self, other):
+        """Continue this run with the part of it parsed from the next chunk"""
+        self.mode = self.mode or other.mode
+        if other.start is not None:
+            self.seen(other.start)
+            self.end = other.end
+        self.messages += other.messages
+        self.errors += other.errors
+        self.stop = other.stop or self.stop
+        self.closed = other.closed
+        self.minutes.update(other.minutes)
+        if other.messages:
+            if self.first_message is None:
+                self.first_message, self.first_counter = other.first_message, other.first_counter
+            self.last_message, self.last_counter = other.last_message, other.last_counter
+
+    def continues_into(self, other):
+        """Whether other, the first run of the next chunk, is really this run going on"""
+        if self.closed or other.explicit:
+            return False
+        if other.mode is None or self.mode is None:
+            return True
+        if other.mode != self.mode:
+            return False
+        return (self.mode == 'mixed' or self.last_counter is None or other.first_counter is None
+                or other.first_counter > self.last_counter)
+
+    def to_dict(self):
+        duration = (self.end - self.start) if self.start is not None else 0.0
+        return {
+            "mode": self.mode or "unknown",
+            "start": format_time(self.start),
+            "end": format_time(self.end),
+            "duration_s": round(duration, 3),
+            "messages": self.messages,
+            "mean_per_minute": round(self.messages / (duration / 60), 2) if duration > 0 else float(self.messages),
+            "peak_per_minute": max(self.minutes.values(), default=0),
+            "errors": self.errors,
+            "stop": self.stop or "unknown",
+        }
+
+
+def format_time(t):
+    if t is None:
+        return None
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(t)) + f",{int(round(t % 1 * 1000)) % 1000:03d}"
+
+
+class LogSummary:
+    """Single-pass statistics over log lines; summaries of consecutive chunks merge"""
+
+    def __init__(self):
+        self.lines = 0
+        self.unparsed = 0
+        self.runs = []
+        self.current = None
+        self.per_minute = Counter()
+        self.gaps = {}
+        self.errors = Counter()
+        self.error_samples = []
+        # Errors before the first run of a chunk belong to a run the previous chunk opened
+        self.leading_errors = 0
+        self.minute_starts = {}
+
+    def timestamp(self, minute, seconds, millis):
+        base = self.minute_starts.get(minute)
+        if base is None:
+            # Log times are local wall-clock; treated as UTC they still order and subtract right
+            base = calendar.timegm(time.strptime(minute.decode('ascii'), '%Y-%m-%d %H:%M'))
+            self.minute_starts[minute] = base
+        return base + int(seconds) + int(millis) / 1000
+
+    def open_run(self, mode=None, explicit=False):
+        if self.current is not None:
+            self.current.closed = True
+        self.current = Run(mode, explicit)
+        self.runs.append(self.current)
+        return self.current
+
+    def feed(self, line):
+        self.lines += 1
+        match = LINE.match(line)
+        if match is None:
+            self.unparsed += 1
+            return
+        minute, seconds, millis, level, message = match.groups()
+        t = self.timestamp(minute, seconds, millis)
+        run = self.current
+
+        hit = MESSAGE.match(message)
+        if hit is not None:
+            mode = KIND_MODES[hit.group(1)]
+            counter = int(hit.group(2))
+            # Logs from before start lines were written: a new mode or a counter
+            # going back to the start means a new run. So does a message after a run
+            # known only from its stop line, as when a chunk starts on one.
+            if (run is None or (run.mode is not None and run.mode != mode)
+                    or (run.mode is None and run.stop is not None)
+                    or (mode != 'mixed' and run.last_counter is not None and counter <= run.last_counter)):
+                run = self.open_run(mode)
+            run.mode = mode
+            run.seen(t)
+            run.messages += 1
+            run.minutes[minute] += 1
+            self.per_minute[minute, mode] += 1
+            if run.last_message is not None:
+                gaps = self.gaps.get(mode)
+                if gaps is None:
+                    gaps = self.gaps[mode] = LatencyHistogram()
+                gaps.record(t - run.last_message)
+            else:
+                run.first_message, run.first_counter = t, counter
+            run.last_message, run.last_counter = t, counter
+            return
+
+        if message.startswith(b'Bot '):
+            started = STARTED.match(message)
+            if started is not None:
+                self.open_run(started.group(1).decode('ascii'), explicit=True).seen(t)
+                return
+            if run is None:
+                run = self.open_run()
+            run.seen(t)
+            stopped = STOPPED.match(message)
+            if stopped is not None:
+                run.stop = run.stop or stopped.group(1).decode('ascii')
+                run.closed = True
+                self.current = None
+            elif message.startswith(b'Bot stopped by user'):
+                run.stop = 'interrupted'
+            elif message.startswith(b'Bot error'):
+                run.stop = 'error'
+
+        if level in (b'ERROR', b'CRITICAL'):
+            kind = next((name for prefix, name in ERROR_KINDS if message.startswith(prefix)), 'other')
+            self.errors[kind] += 1
+            if self.current is not None:
+                self.current.errors += 1
+            elif not self.runs:
+                self.leading_errors += 1
+            if len(self.error_samples) < MAX_ERROR_SAMPLES:
+                self.error_samples.append(f"{format_time(t)} {message.decode('utf-8', 'replace')}")
+
+    def merge(self, other):
+        """Append the summary of the chunk that follows this one"""
+        self.lines += other.lines
+        self.unparsed += other.unparsed
+        self.per_minute.update(other.per_minute)
+        self.errors.update(other.errors)
+        self.error_samples.extend(other.error_samples[:MAX_ERROR_SAMPLES - len(self.error_samples)])
+        for mode, gaps in other.gaps.items():
+            self.gaps.setdefault(mode, LatencyHistogram()).merge(gaps)
+
+        runs = other.runs
+        if self.runs and not self.runs[-1].closed:
+            self.runs[-1].errors += other.leading_errors
+        elif not self.runs:
+            self.leading_errors += other.leading_errors
+        # A run of the next chunk with no mode is the stop of this chunk's last
+        # run; the one after it may carry on the same run too
+        while runs and self.runs and self.runs[-1].continues_into(runs[0]):
+            last, first = self.runs[-1], runs[0]
+            if last.last_message is not None and first.first_message is not None:
+                self.gaps.setdefault(last.mode, LatencyHistogram()).record(first.first_message - last.last_message)
+            last.absorb(first)
+            runs = runs[1:]
+        self.runs.extend(runs)
+        return self
+
+    def to_dict(self):
+        modes = {}
+        for run in self.runs:
+            stats = modes.setdefault(run.mode or "unknown", {"runs": 0, "messages": 0, "peak_per_minute": 0})
+            stats["runs"] += 1
+            stats["messages"] += run.messages
+            stats["peak_per_minute"] = max(stats["peak_per_minute"], max(run.minutes.values(), default=0))
+        for mode, gaps in self.gaps.items():
+            modes.setdefault(mode, {})["gaps"] = {k: round(v, 3) for k, v in gaps.summary().items()}
+
+        per_minute = {}
+        for (minute, mode), count in sorted(self.per_minute.items()):
+            per_minute.setdefault(minute.decode('ascii'), {})[mode] = count
+        return {
+            "lines": self.lines,
+            "unparsed_lines": self.unparsed,
+            "messages": sum(run.messages for run in self.runs),
+            "modes": modes,
+            "stops": dict(Counter(run.stop or "unknown" for run in self.runs)),
+            "errors": dict(self.errors),
+            "error_samples": self.error_samples,
+            "runs": [run.to_dict() for run in self.runs],
+            "per_minute": per_minute,
+        }
+
+
+def log_files(base):
+    """base and its rotated siblings (base.1, base.2.gz, ...), oldest first"""
+    directory = os.path.dirname(base)
+    name = os.path.basename(base)
+    rotated = []
+    for entry in os.listdir(directory or '.'):
+        if entry.startswith(name + '.'):
+            match = ROTATED.fullmatch(entry[len(name):])
+            if match:
+                rotated.append((int(match.group(1)), os.path.join(directory, entry)))
+    files = [path for _, path in sorted(rotated, reverse=True)]
+    for path in (base + '.gz', base):
+        if os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def chunks(path, chunk_bytes=CHUNK_BYTES):
+    """(path, start, end) byte ranges that each begin at a line start"""
+    if path.endswith('.gz'):
+        # Compressed files can't be split; each is one task
+        return [(path, 0, None)]
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        while bounds[-1] + chunk_bytes < size:
+            f.seek(bounds[-1] + chunk_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(path, start, end) for start, end in zip(bounds, bounds[1:])]
+
+
+def parse_chunk(task):
+    path, start, end = task
+    summary = LogSummary()
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        if end is None:
+            for line in f:
+                summary.feed(line)
+        else:
+            f.seek(start)
+            remaining = end - start
+            for line in f:
+                summary.feed(line)
+                remaining -= len(line)
+                if remaining <= 0:
+                    break
+    summary.minute_starts = {}
+    return summary
+
+
+def analyze(paths, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Summary of the given log files, read in order; chunks are parsed in parallel"""
+    tasks = [task for path in paths for task in chunks(path, chunk_bytes)]
+    summary = LogSummary()
+    if len(tasks) <= 1 or workers == 1:
+        for task in tasks:
+            summary.merge(parse_chunk(task))
+        return summary
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() hands results back in order, so runs crossing chunks join up
+        for part in pool.map(parse_chunk, tasks):
+            summary.merge(part)
+    return summary
+
+
+def write_report(report, path):
+    """JSON for the whole report, or CSV with one row per run"""
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            runs = report["runs"]
+            writer = csv.DictWriter(f, fieldnames=list(Run().to_dict()))
+            writer.writeheader()
+            writer.writerows(runs)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def print_report(report):
+    print(f"{report['lines']} lines, {report['messages']} messages in {len(report['runs'])} runs")
+    for mode, stats in report["modes"].items():
+        gaps = stats.get("gaps")
+        gap_text = f"  gap p50 {gaps['p50']}s p99 {gaps['p99']}s" if gaps else ""
+        print(f"  {mode:8} {stats.get('runs', 0):5} runs {stats.get('messages', 0):8} messages  "
+              f"peak {stats.get('peak_per_minute', 0)}/min{gap_text}")
+    if report["stops"]:
+        print("Stops: " + ", ".join(f"{reason} {count}" for reason, count in report["stops"].items()))
+    if report["errors"]:
+        print("Errors: " + ", ".join(f"{kind} {count}" for kind, count in report["errors"].items()))
+    for sample in report["error_samples"]:
+        print(f"  {sample}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize quote bot runs from its log files")
+    parser.add_argument("logs", nargs="*", default=["quote_bot.log"],
+                        help="log files; a single base name also reads its rotated siblings")
+    parser.add_argument("--output", help="write the report as .json, or the runs as .csv")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    paths = log_files(args.logs[0]) if len(args.logs) == 1 else args.logs
+    if not paths:
+        print(f"No log files found for {args.logs[0]}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    report = analyze(paths, args.workers).to_dict()
+    elapsed = time.perf_counter() - started
+    print_report(report)
+    print(f"Parsed {len(paths)} files in {elapsed:.2f}s")
+    if args.output:
+        write_report(report, args.output)
+        print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
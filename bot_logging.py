@@ -0,0 +1,110 @@
+import logging
+import logging.handlers
+import queue
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class DeferredFlushMixin:
+    """Let the listener flush once per batch instead of once per record"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchRotatingFileHandler(DeferredFlushMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchQueueListener:
+    """Drain a log queue on a background thread, writing records in batches"""
+
+    def __init__(self, log_queue, handlers, batch_size=256):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.thread = None
+        self.stop_token = object()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.monitor, name="quote-bot-logging", daemon=True)
+        self.thread.start()
+
+    def monitor(self):
+        while True:
+            # Block for the first record, then take whatever else is already queued
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = False
+            for record in batch:
+                if record is self.stop_token:
+                    stopping = True
+                    continue
+                if isinstance(record, threading.Event):
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                handler.flush_batch()
+            # Flush requests are answered only after the records queued before them
+            for record in batch:
+                if isinstance(record, threading.Event):
+                    record.set()
+            if stopping:
+                return
+
+    def flush(self, timeout=5):
+        """Wait until everything logged so far has been written"""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def stop(self):
+        """Write out everything still queued, then stop the thread"""
+        if self.thread is None:
+            return
+        self.queue.put(self.stop_token)
+        self.thread.join()
+        self.thread = None
+        for handler in self.handlers:
+            handler.close()
+
+
+def start_logging(name, log_file='quote_bot.log', max_bytes=5 * 1024 * 1024, backup_count=3,
+                  batch_size=256, console=True):
+    """Route a logger through a queue so callers never block on file or console I/O"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [BatchRotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                         encoding='utf-8')]
+    if console:
+        handlers.append(BatchStreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = BatchQueueListener(log_queue, handlers, batch_size)
+    listener.start()
+    return logger, listener
@@ -0,0 +1,132 @@
+import json
+import os
+
+# Log-linear buckets over whole microseconds, HDR-histogram style: exact below
+# 16us, then 8 buckets per power of two, so every bucket is within 12.5%.
+SUB_BUCKETS = 8
+
+
+def bucket_index(micros):
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - 4
+    return shift * SUB_BUCKETS + (micros >> shift)
+
+
+def bucket_bounds(index):
+    """Lowest and highest microsecond value that lands in a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = (index - SUB_BUCKETS) // SUB_BUCKETS
+    low = (index - shift * SUB_BUCKETS) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-precision latency histogram; recording is a couple of integer ops"""
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        index = bucket_index(max(int(seconds * 1_000_000), 0))
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add another histogram's recordings to this one"""
+        counts = self.counts
+        if len(other.counts) > len(counts):
+            counts.extend([0] * (len(other.counts) - len(counts)))
+        for index, n in enumerate(other.counts):
+            counts[index] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        """Upper bound, in seconds, of the bucket holding the p-th percentile"""
+        if not self.count:
+            return 0.0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(bucket_bounds(index)[1] / 1_000_000, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class BotMetrics:
+    """Per-mode send counters and latency histograms"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, mode, amount=1):
+        key = (name, mode)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, mode, seconds):
+        key = (name, mode)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def to_dict(self):
+        result = {}
+        for (name, mode), value in self.counters.items():
+            result.setdefault(mode, {})[name] = value
+        for (name, mode), histogram in self.histograms.items():
+            result.setdefault(mode, {})[name] = histogram.summary()
+        return result
+
+    def to_prometheus(self):
+        lines = []
+        for (name, mode), value in sorted(self.counters.items()):
+            lines.append(f'quote_bot_{name}_total{{test_mode="{mode}"}} {value}')
+        for (name, mode), histogram in sorted(self.histograms.items()):
+            metric = f"quote_bot_{name}_seconds"
+            cumulative = 0
+            for index, n in enumerate(histogram.counts):
+                if not n:
+                    continue
+                cumulative += n
+                upper = bucket_bounds(index)[1] / 1_000_000
+                lines.append(f'{metric}_bucket{{test_mode="{mode}",le="{upper:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{test_mode="{mode}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{test_mode="{mode}"}} {histogram.total:.6f}')
+            lines.append(f'{metric}_count{{test_mode="{mode}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write JSON, or Prometheus text format for a .prom file, atomically"""
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
@@ -0,0 +1,93 @@
+import importlib
+import json
+import time
+
+
+class SystemClock:
+    """Real wall-clock time"""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Virtual time: sleeping just moves the clock forward"""
+
+    def __init__(self, start=0.0):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += max(seconds, 0)
+
+
+class GuiSink:
+    """Paste each message into the focused window and press Enter"""
+
+    def __init__(self):
+        # Imported here so headless runs never need a display or clipboard
+        import pyautogui
+        import pyperclip
+        self.pyautogui = pyautogui
+        self.pyperclip = pyperclip
+
+    def send(self, message):
+        self.pyperclip.copy(message)
+        self.pyautogui.hotkey('ctrl', 'v')
+        self.pyautogui.press('enter')
+
+
+class MemorySink:
+    """Keep sent messages in a list instead of sending them anywhere"""
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append(message)
+
+
+class StdoutSink:
+    """Print messages instead of sending them"""
+
+    def send(self, message):
+        print(message)
+
+
+# Send backends by name; resolved only when the first message goes out
+SINKS = {
+    "gui": GuiSink,
+    "memory": MemorySink,
+    "stdout": StdoutSink,
+}
+
+
+def load_sink(name):
+    """Create a send backend by name, or from 'module:Class' for one of your own"""
+    if name in SINKS:
+        return SINKS[name]()
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f"Unknown send backend {name!r}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class Timeline:
+    """Timestamped record of what a run did"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.events = []
+
+    def record(self, event, **fields):
+        self.events.append({"t": round(self.clock.now(), 6), "event": event, **fields})
+
+    def write_jsonl(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in self.events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
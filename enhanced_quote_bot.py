@@ -1,73 +1,102 @@
-import pyautogui
-import time
+import argparse
+import dataclasses
 import random
-import pyperclip
 import json
 import os
+import time
+import atexit
+from array import array
 from datetime import datetime
-import logging
+from collections import Counter, deque
+from quote_sampler import AliasSampler, PersistentBag, ShuffleBag
+from quote_corpus import QuoteCorpus
+from quote_library import get_library, split_quote
+from quote_journal import QuoteStore, read_quote_file
+from quote_dedup import MinHashIndex, DUPLICATE_FILE
+from quote_search import QuoteSearchIndex, SEARCH_FILE
+from bot_config import ConfigFile, FIELDS, TEST_MODES, parse_value
+from bot_logging import start_logging
+from bot_metrics import BotMetrics
+from bot_runtime import SystemClock, SimulatedClock, MemorySink, Timeline, load_sink
 
 class QuoteBot:
-    def __init__(self, config_file='config.json'):
+    def __init__(self, config_file='config.json', clock=None, sink=None):
         self.config_file = config_file
         self.load_config()
+        # Real clock by default; tests swap in virtual ones. The send backend
+        # (GUI paste unless configured otherwise) is only loaded once a run starts.
+        self.clock = clock or SystemClock()
+        self.sink = sink
+        self.timeline = None
+        self.metrics = BotMetrics()
+        self.last_send_time = None
+        # Reset when a run starts; set here so direct send_message() calls work too
+        self.last_metrics_export = self.clock.now()
+        self.random = random.Random(self.config.quote_seed)
         self.setup_logging()
-        self.quotes = self.load_quotes()
-        self.used_quotes = set()
+        self.quotes = QuoteStore(self.load_quotes(),
+                                 compact_bytes=self.config.journal_compact_bytes)
+        self.sampler = None
+        self.reset_sampler()
+        self.weighted_sampler = None
+        self.duplicate_index = None
+        self.search_index = None
         self.spam_patterns = self.load_spam_patterns()
         
     def load_config(self):
-        """Load configuration from JSON file"""
-        default_config = {
-            "message_prefix": ">>> ",
-            "min_delay": 2,
-            "max_delay": 5,
-            "initial_delay": 2,
-            "max_messages": 100,
-            "avoid_repeats": True,
-            "log_messages": True,
-            "test_mode": "normal",  # normal, burst, flood, pattern, mixed
-            "burst_count": 5,
-            "burst_delay": 0.1,
-            "flood_rate": 0.5,
-            "pattern_repeat": 3,
-            "similar_message_chance": 0.3,
-            "caps_chance": 0.2,
-            "spam_words_chance": 0.1
-        }
-        
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    self.config = {**default_config, **json.load(f)}
-            except json.JSONDecodeError:
-                print(f"Error reading {self.config_file}, using defaults")
-                self.config = default_config
-        else:
-            self.config = default_config
-            self.save_config()
+        """Load and validate configuration from JSON file"""
+        self.config_store = ConfigFile(self.config_file)
+        self.config = self.config_store.load()
+        self.loaded_config = self.config
+        # Settings that apply on top of the config file, e.g. for a dry run
+        self.overrides = {}
     
     def save_config(self):
         """Save current configuration to JSON file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        self.config_store.save(self.config)
+        self.loaded_config = self.config_store.config
+    
+    def refresh_config(self):
+        """Pick up edits to the config file without restarting"""
+        config = self.config_store.current()
+        if config is not self.loaded_config:
+            self.loaded_config = config
+            if self.overrides:
+                config = dataclasses.replace(config, **self.overrides)
+            self.config = config
+            if self.logger:
+                self.logger.info(f"Reloaded {self.config_file}")
+        return self.config
     
     def setup_logging(self):
         """Set up logging if enabled"""
-        if self.config.get('log_messages', True):
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s',
-                handlers=[
-                    logging.FileHandler('quote_bot.log'),
-                    logging.StreamHandler()
-                ]
+        self.log_listener = None
+        if self.config.log_messages:
+            # Records go through a queue; a background thread writes them in batches
+            self.logger, self.log_listener = start_logging(
+                __name__,
+                log_file=self.config.log_file,
+                max_bytes=self.config.log_max_bytes,
+                backup_count=self.config.log_backup_count
             )
-            self.logger = logging.getLogger(__name__)
+            atexit.register(self.close_logging)
         else:
             self.logger = None
     
-    def load_spam_patterns(self):
+    def close_logging(self):
+        """Flush queued log records and stop the logging thread"""
+        if self.log_listener is not None:
+            self.log_listener.stop()
+            self.log_listener = None
+            self.logger = None
+    
+    def echo(self, text):
+        """Per-message console line; optional since the log already shows it"""
+        if self.config.print_messages:
+            print(text)
+    
+    @staticmethod
+    def load_spam_patterns():
         """Load spam testing patterns"""
         return {
             "spam_words": ["FREE", "CLICK HERE", "URGENT", "LIMITED TIME", "ACT NOW", "WINNER", "CONGRATULATIONS"],
@@ -88,10 +117,15 @@ class QuoteBot:
             ]
         }
     
-    def load_quotes(self):
-        """Load quotes from file or use default list"""
+    @staticmethod
+    def load_quotes():
+        """Load quotes from the indexed corpus, quotes.json or the default list"""
         quotes_file = 'quotes.json'
         
+        # Indexed corpus: mmap'd, so startup cost doesn't grow with its size
+        if QuoteCorpus.exists('quotes'):
+            return QuoteCorpus('quotes')
+        
         if os.path.exists(quotes_file):
             try:
                 with open(quotes_file, 'r') as f:
@@ -99,290 +133,314 @@ class QuoteBot:
             except json.JSONDecodeError:
                 print(f"Error reading {quotes_file}, using default quotes")
         
-        # Default quotes (your original list)
-        return [
-            "If you win, you live. If you lose, you die. If you don't fight, you can't win. - Eren Yeager",
-            "The world is merciless, and it's also very beautiful. - Mikasa Ackerman",
-            "A lesson without pain is meaningless. That's because you can't gain something without sacrificing something in return. - Edward Elric",
-            "The only thing we're allowed to do is to believe that we won't regret the choice we made. - Levi Ackerman",
-            "Chaos isn't a pit. Chaos is a ladder. - Petyr Baelish",
-            "When you play the game of thrones, you win or you die. - Cersei Lannister",
-            "The things I do for love. - Jaime Lannister",
-            "A lion doesn't concern itself with the opinion of sheep. - Tywin Lannister",
-            "Winter is coming. - Ned Stark",
-            "The night is dark and full of terrors. - Melisandre",
-            "Fear cuts deeper than swords. - Arya Stark",
-            "Power resides where men believe it resides. - Varys",
-            "The world is full of monsters with friendly faces. - Reiner Braun",
-            "The only true fear is fear itself. - Hange Zoë",
-            "You should enjoy the little things in life, for one day you may look back and realize they were the big things. - Kurt Vonnegut",
-            "The freedom to make decisions is the freedom to make mistakes. - Armin Arlert",
-            "Every flight begins with a fall. - Hange Zoë",
-            "A mind needs books as a sword needs a whetstone. - Tyrion Lannister",
-            "When you tear out a man's tongue, you are not proving him a liar, you're only telling the world that you fear what he might say. - Tyrion Lannister",
-            "The good ones always die young. - Sasha Blouse",
-            "I want to see and understand the world outside. - Historia Reiss",
-            "A girl is Arya Stark of Winterfell. And I'm going home. - Arya Stark",
-            "There is only one war that matters—the Great War. And it is here. - Jon Snow",
-            "A reader lives a thousand lives before he dies. The man who never reads lives only one. - Jojen Reed",
-            "People die when they are killed. - Eren Yeager",
-            "You cannot hope to bribe or twist... thank God! I've paid my debts. - Tyrion Lannister",
-            "There's always another secret. - Vin",
-            "Don't be ashamed of who you are. - Kelsier",
-            "Sometimes the prize is not worth the costs. - Sazed",
-            "I promise you, the world is changing. And the things we fear most may be what save us. - Vin",
-            "The most important step a man can take is always the next one. - Kelsier",
-            "You should never be ashamed of what you truly are. - Kelsier",
-            "The only real freedom you have is the freedom to make mistakes. - Sazed",
-            "You want to know what's wrong with the world? Everyone lies. - Vin",
-            "We're all broken in some way. The question is what you do with the pieces. - Vin",
-            "Sometimes, you have to do what's right, not what's easy. - Kelsier",
-            "True strength is found in the moments when you want to give up but you keep going anyway. - Vin",
-            "There is always hope. You just have to find it. - Sazed",
-            "Faith isn't about knowing. It's about believing. - Sazed",
-            "The best lies are those that contain a grain of truth. - Kelsier",
-            "Power comes at a cost, and you must be willing to pay the price. - Vin",
-            "In this world, everyone wears a mask. - Klein Moretti",
-            "Secrets are the currency of power. - Klein Moretti",
-            "The world hides many truths, but it always reveals itself to those who seek. - Klein Moretti",
-            "Knowledge is the key to survival in the shadows. - Sherlock",
-            "Sometimes the truth is more terrifying than any lie. - Klein Moretti",
-            "Destiny is not set in stone; it is carved by the choices we make. - Klein Moretti",
-            "In the game of secrets, trust is the rarest treasure. - Klein Moretti",
-            "Power is meaningless without control. - Klein Moretti",
-            "Even the smallest actions can change the course of fate. - Klein Moretti",
-            "When you walk through darkness, be the light that guides your way. - Klein Moretti",
-            "We are but pawns in a greater game, but pawns with the power to change the board. - Klein Moretti",
-            "Hope is a fragile thing, but it is all we have sometimes. - Klein Moretti",
-            "The past is a shadow that stretches long, but it cannot dictate your future. - Klein Moretti",
-            "No one escapes the consequences of their choices, but some learn faster than others. - Klein Moretti",
-            "Fear is a tool; wield it wisely or be consumed by it. - Klein Moretti",
-            "The road to truth is paved with illusions and lies. - Klein Moretti",
-            "In silence, the loudest secrets are kept. - Klein Moretti",
-            "True power comes not from what you control, but from what you understand. - Klein Moretti",
-            "To survive in the mist, one must learn to embrace the unknown. - Klein Moretti",
-            "The eyes may see, but the soul perceives. - Klein Moretti",
-            "The future is built on the dreams we dare to dream. - Kenji Endo",
-            "Sometimes the truth hides behind the biggest lies. - Friend",
-            "We all have our roles to play, no matter how small. - Maruo",
-            "The past is a mystery we must unravel to save tomorrow. - Kenji Endo",
-            "Friendship is the strongest weapon we have against the darkness. - Kenji Endo",
-            "Sometimes to save the world, we have to lose ourselves first. - Kenji Endo",
-            "Even the smallest actions can echo through time. - Friend",
-            "Hope is a fragile thing, but it keeps us moving forward. - Maruo",
-            "In the end, the real enemy is fear itself. - Kenji Endo",
-            "The fate of many rests in the hands of the few who dare to fight. - Friend",
-            "You were born to be a sacrifice. - Griffith",
-            "Dreams are like the wind; they cannot be held, but they carry us forward. - Guts",
-            "The only thing we're allowed to do is to believe that we won't regret the choice we made. - Guts",
-            "Struggle is what makes life worth living. - Guts",
-            "In this world, the weak are meat, and the strong eat. - Griffith",
-            "Sometimes, the hardest battles are the ones within ourselves. - Casca",
-            "Fate is cruel, but we are crueler. - Guts",
-            "Revenge is the sweetest pleasure that follows pain. - Guts",
-            "I have no dreams anymore. No hopes, no plans. I live for the moment. - Guts",
-            "The world is full of evil, but it's up to us to fight it. - Guts",
-            "A single person can change the course of history. - Kenji Endo",
-            "Sometimes the greatest monsters are the people we trust. - Friend",
-            "To protect what you love, you must first understand your own fears. - Maruo",
-            "The world isn't saved by heroes, but by those who refuse to give up. - Kenji Endo",
-            "Memories can be both a curse and a blessing. - Friend",
-            "Every generation has its own battles to fight. - Kenji Endo",
-            "The truth is a double-edged sword; it can free or destroy. - Maruo",
-            "Friendship and hope can light even the darkest paths. - Kenji Endo",
-            "We fight because the future depends on us. - Friend",
-            "Sometimes you must lose yourself to find the real truth. - Kenji Endo",
-            "What is broken can be reforged stronger than before. - Guts",
-            "The pain of loss is the price of love. - Casca",
-            "Hatred is a fire that burns within, fueling strength and despair alike. - Guts",
-            "In the end, all we have are the choices we make. - Griffith",
-            "Even in darkness, the human spirit can find its way. - Guts",
-            "The scars we carry tell the story of our survival. - Guts",
-            "To live is to fight, to fight is to survive. - Guts",
-            "True strength is standing despite the pain. - Casca",
-            "Destiny is cruel, but so am I. - Guts",
-            "In a world without mercy, kindness is rebellion. - Guts"
-        ]
+        # Default quotes, shared with the other scripts
+        return get_library()
     
-    def get_random_quote(self):
-        """Get a random quote, avoiding repeats if configured"""
-        if self.config.get('avoid_repeats', True):
-            available_quotes = [q for q in self.quotes if q not in self.used_quotes]
-            
-            # Reset used quotes if we've used them all
-            if not available_quotes:
-                self.used_quotes.clear()
-                available_quotes = self.quotes
-            
-            quote = random.choice(available_quotes)
-            self.used_quotes.add(quote)
-            return quote
+    def reset_sampler(self):
+        """(Re)build the no-repeat sampler over the current quote indices"""
+        if self.sampler is not None:
+            self.close_sampler()
+        if self.config.used_quotes_file:
+            # The cycle carries over restarts; a changed corpus starts a new one
+            self.sampler = PersistentBag(self.config.used_quotes_file, self.quotes, self.config.quote_seed)
         else:
-            return random.choice(self.quotes)
+            self.sampler = ShuffleBag(len(self.quotes), self.config.quote_seed)
+        self.sampler_generation = self.quotes.generation
     
-    def send_message(self, message):
-        """Send a message using pyautogui"""
+    def close_sampler(self):
+        if hasattr(self.sampler, 'close'):
+            self.sampler.close()
+    
+    def weight_settings(self):
+        config = self.config
+        return (config.author_weight_power, tuple(sorted(config.author_weights.items())),
+                config.recency_penalty, config.recency_window)
+    
+    def quote_weight(self, quote):
+        """Selection weight of a quote from the author settings"""
+        config = self.config
+        author = split_quote(quote)[1]
+        weight = config.author_weights.get(author, 1.0)
+        if config.author_weight_power:
+            weight /= self.author_counts[author] ** config.author_weight_power
+        return weight
+    
+    def build_weighted_sampler(self):
+        """Alias table over every quote's weight; O(n) once, then O(1) per pick"""
+        config = self.config
+        if config.author_weight_power:
+            self.author_counts = Counter(split_quote(quote)[1] for quote in self.quotes)
+        if config.author_weight_power or config.author_weights:
+            weights = (self.quote_weight(quote) for quote in self.quotes)
+        else:
+            weights = array('d', [1.0]) * len(self.quotes)
+        self.weighted_sampler = AliasSampler(weights, config.quote_seed)
+        self.weighted_settings = self.weight_settings()
+        self.weighted_generation = self.quotes.generation
+        self.recent = deque()
+        self.recent_counts = Counter()
+    
+    def pick_weighted(self):
+        """Draw by author weight, making recently sent quotes less likely"""
+        if (self.weighted_sampler is None or self.weighted_settings != self.weight_settings()
+                or self.weighted_generation != self.quotes.generation):
+            self.build_weighted_sampler()
+        sampler, config = self.weighted_sampler, self.config
+        
+        while True:
+            index = sampler.draw()
+            if self.quotes.is_live(index):
+                break
+            sampler.set_weight(index, 0.0)
+        
+        if config.recency_penalty:
+            weight = self.quote_weight(self.quotes[index])
+            sampler.set_weight(index, weight * (1 - config.recency_penalty))
+            self.recent.append(index)
+            self.recent_counts[index] += 1
+            # Never hold back more than half the quotes, so picks stay O(1)
+            while len(self.recent) > min(config.recency_window, len(self.quotes) // 2):
+                old = self.recent.popleft()
+                self.recent_counts[old] -= 1
+                if not self.recent_counts[old]:
+                    del self.recent_counts[old]
+                    sampler.set_weight(old, self.quote_weight(self.quotes[old]))
+        return index
+    
+    def get_random_quote(self):
+        """Get a random quote, weighted or avoiding repeats as configured"""
+        # A compaction that dropped removed quotes shifts every index after them
+        if self.sampler_generation != self.quotes.generation:
+            self.reset_sampler()
+        
+        config = self.config
+        if config.author_weight_power or config.author_weights or config.recency_penalty:
+            return self.quotes[self.pick_weighted()]
+        
+        for _ in range(len(self.quotes)):
+            if config.avoid_repeats:
+                # Each quote comes up once per cycle, O(1) per pick
+                index = self.sampler.draw()
+            else:
+                index = self.sampler.random.randrange(len(self.quotes))
+            if self.quotes.is_live(index):
+                return self.quotes[index]
+        raise IndexError("No quotes left to pick from")
+    
+    def send_message(self, message, kind=None):
+        """Send a message through the configured send backend"""
+        mode = self.config.test_mode
+        self.metrics.increment('send_attempts', mode)
+        if self.sink is None:
+            # Outside the per-message handler: a backend that can't load is not a failed send
+            self.sink = load_sink(self.config.send_backend)
+        started = time.perf_counter()
         try:
-            pyperclip.copy(message)
-            pyautogui.hotkey('ctrl', 'v')
-            pyautogui.press('enter')
-            return True
+            self.sink.send(message)
+            sent = True
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error sending message: {e}")
-            return False
+            sent = False
+        self.metrics.observe('send_latency', mode, time.perf_counter() - started)
+        self.metrics.increment('send_success' if sent else 'send_failure', mode)
+        
+        now = self.clock.now()
+        if self.last_send_time is not None:
+            self.metrics.observe('message_gap', mode, now - self.last_send_time)
+        self.last_send_time = now
+        if now - self.last_metrics_export >= self.config.metrics_interval:
+            self.export_metrics()
+        
+        if self.timeline is not None:
+            self.timeline.record("send", mode=mode, kind=kind or mode, ok=sent, message=message)
+        return sent
+    
+    def export_metrics(self):
+        """Write the metrics collected so far to metrics_file"""
+        self.last_metrics_export = self.clock.now()
+        metrics_file = self.config.metrics_file
+        if not metrics_file:
+            return
+        try:
+            self.metrics.export(metrics_file)
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"Error writing metrics: {e}")
     
     def generate_spam_message(self, base_message):
         """Generate spam-like variations of a message for testing"""
         message = base_message
         
         # Add caps randomly
-        if random.random() < self.config.get('caps_chance', 0.2):
+        if self.random.random() < self.config.caps_chance:
             message = message.upper()
         
         # Add spam words
-        if random.random() < self.config.get('spam_words_chance', 0.1):
-            spam_word = random.choice(self.spam_patterns['spam_words'])
+        if self.random.random() < self.config.spam_words_chance:
+            spam_word = self.random.choice(self.spam_patterns['spam_words'])
             message = f"{spam_word} {message}"
         
         # Add repeat characters
-        if random.random() < 0.3:
-            repeat_char = random.choice(self.spam_patterns['repeat_chars'])
+        if self.random.random() < 0.3:
+            repeat_char = self.random.choice(self.spam_patterns['repeat_chars'])
             message = f"{message}{repeat_char}"
         
         return message
     
     def run_burst_test(self):
         """Send messages in quick bursts to test burst detection"""
-        burst_count = self.config.get('burst_count', 5)
-        burst_delay = self.config.get('burst_delay', 0.1)
+        burst_count = self.config.burst_count
         
         for i in range(burst_count):
+            config = self.refresh_config()
             quote = self.get_random_quote()
-            message = self.config['message_prefix'] + quote
+            message = config.message_prefix + quote
             
             if self.send_message(message):
                 if self.logger:
                     self.logger.info(f"Burst message {i+1}/{burst_count}: {quote[:30]}...")
-                print(f"Burst message {i+1}/{burst_count} sent")
+                self.echo(f"Burst message {i+1}/{burst_count} sent")
             
-            time.sleep(burst_delay)
+            self.clock.sleep(config.burst_delay)
     
     def run_flood_test(self):
         """Send messages rapidly to test flood detection"""
-        flood_rate = self.config.get('flood_rate', 0.5)
         message_count = 0
-        max_messages = self.config['max_messages']
         
-        while message_count < max_messages:
-            flood_msg = random.choice(self.spam_patterns['flood_messages'])
-            message = self.config['message_prefix'] + flood_msg + f" #{message_count + 1}"
+        while message_count < self.config.max_messages:
+            config = self.refresh_config()
+            flood_msg = self.random.choice(self.spam_patterns['flood_messages'])
+            message = config.message_prefix + flood_msg + f" #{message_count + 1}"
             
             if self.send_message(message):
                 message_count += 1
                 if self.logger:
                     self.logger.info(f"Flood message {message_count}: {flood_msg}")
-                print(f"Flood message {message_count} sent")
+                self.echo(f"Flood message {message_count} sent")
             
-            time.sleep(flood_rate)
+            self.clock.sleep(config.flood_rate)
     
     def run_pattern_test(self):
         """Send similar messages to test pattern detection"""
-        pattern_repeat = self.config.get('pattern_repeat', 3)
         similar_messages = self.spam_patterns['similar_messages']
         
         message_count = 0
-        max_messages = self.config['max_messages']
         
-        while message_count < max_messages:
+        while message_count < self.config.max_messages:
             # Send each similar message multiple times
             for similar_msg in similar_messages:
-                for _ in range(pattern_repeat):
-                    if message_count >= max_messages:
+                for _ in range(self.config.pattern_repeat):
+                    config = self.refresh_config()
+                    if message_count >= config.max_messages:
                         break
                     
-                    message = self.config['message_prefix'] + similar_msg
+                    message = config.message_prefix + similar_msg
                     
                     if self.send_message(message):
                         message_count += 1
                         if self.logger:
                             self.logger.info(f"Pattern message {message_count}: {similar_msg}")
-                        print(f"Pattern message {message_count} sent")
+                        self.echo(f"Pattern message {message_count} sent")
                     
-                    delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-                    time.sleep(delay)
+                    delay = self.random.uniform(config.min_delay, config.max_delay)
+                    self.clock.sleep(delay)
                 
-                if message_count >= max_messages:
+                if message_count >= self.config.max_messages:
                     break
     
     def run_mixed_test(self):
         """Mix different spam patterns to test comprehensive detection"""
         message_count = 0
-        max_messages = self.config['max_messages']
         
         test_types = ['normal', 'burst', 'similar', 'spam_words']
         
-        while message_count < max_messages:
-            test_type = random.choice(test_types)
+        while message_count < self.config.max_messages:
+            config = self.refresh_config()
+            test_type = self.random.choice(test_types)
             
             if test_type == 'normal':
                 quote = self.get_random_quote()
-                message = self.config['message_prefix'] + quote
+                message = config.message_prefix + quote
                 
-                if self.send_message(message):
+                if self.send_message(message, kind="normal"):
                     message_count += 1
-                    print(f"Normal message {message_count} sent")
+                    if self.logger:
+                        self.logger.info(f"Mixed message {message_count} (normal): {message[:50]}")
+                    self.echo(f"Normal message {message_count} sent")
                 
-                delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-                time.sleep(delay)
+                delay = self.random.uniform(config.min_delay, config.max_delay)
+                self.clock.sleep(delay)
             
             elif test_type == 'burst':
-                remaining_messages = max_messages - message_count
-                burst_size = min(self.config.get('burst_count', 5), remaining_messages)
+                remaining_messages = config.max_messages - message_count
+                burst_size = min(config.burst_count, remaining_messages)
                 
                 for i in range(burst_size):
                     quote = self.get_random_quote()
-                    message = self.generate_spam_message(self.config['message_prefix'] + quote)
+                    message = self.generate_spam_message(config.message_prefix + quote)
                     
-                    if self.send_message(message):
+                    if self.send_message(message, kind="burst"):
                         message_count += 1
-                        print(f"Burst message {message_count} sent")
+                        if self.logger:
+                            self.logger.info(f"Mixed message {message_count} (burst): {message[:50]}")
+                        self.echo(f"Burst message {message_count} sent")
                     
-                    time.sleep(self.config.get('burst_delay', 0.1))
+                    self.clock.sleep(config.burst_delay)
                 
                 # Longer pause after burst
-                time.sleep(random.uniform(3, 8))
+                self.clock.sleep(self.random.uniform(3, 8))
             
             elif test_type == 'similar':
-                similar_msg = random.choice(self.spam_patterns['similar_messages'])
-                message = self.config['message_prefix'] + similar_msg
+                similar_msg = self.random.choice(self.spam_patterns['similar_messages'])
+                message = config.message_prefix + similar_msg
                 
-                if self.send_message(message):
+                if self.send_message(message, kind="similar"):
                     message_count += 1
-                    print(f"Similar message {message_count} sent")
+                    if self.logger:
+                        self.logger.info(f"Mixed message {message_count} (similar): {message[:50]}")
+                    self.echo(f"Similar message {message_count} sent")
                 
-                time.sleep(random.uniform(0.5, 2))
+                self.clock.sleep(self.random.uniform(0.5, 2))
             
             elif test_type == 'spam_words':
                 quote = self.get_random_quote()
-                message = self.generate_spam_message(self.config['message_prefix'] + quote)
+                message = self.generate_spam_message(config.message_prefix + quote)
                 
-                if self.send_message(message):
+                if self.send_message(message, kind="spam_words"):
                     message_count += 1
-                    print(f"Spam-like message {message_count} sent")
+                    if self.logger:
+                        self.logger.info(f"Mixed message {message_count} (spam_words): {message[:50]}")
+                    self.echo(f"Spam-like message {message_count} sent")
                 
-                time.sleep(random.uniform(1, 3))
+                self.clock.sleep(self.random.uniform(1, 3))
     
     def run(self):
         """Main bot loop with different test modes"""
-        test_mode = self.config.get('test_mode', 'normal')
+        test_mode = self.refresh_config().test_mode
+        
+        if self.sink is None:
+            try:
+                self.sink = load_sink(self.config.send_backend)
+            except Exception as e:
+                print(f"Could not load send backend {self.config.send_backend!r}: {e}")
+                if self.logger:
+                    self.logger.error(f"Could not load send backend {self.config.send_backend!r}: {e}")
+                return
         
         print(f"Quote Bot starting in {test_mode} mode...")
-        print(f"Initial delay: {self.config['initial_delay']} seconds")
-        print(f"Max messages: {self.config['max_messages']}")
+        print(f"Initial delay: {self.config.initial_delay} seconds")
+        print(f"Max messages: {self.config.max_messages}")
         print("Press Ctrl+C to stop")
         
-        time.sleep(self.config['initial_delay'])
+        if self.logger:
+            self.logger.info(f"Bot started in {test_mode} mode")
+        if self.timeline is not None:
+            self.timeline.record("start", mode=test_mode)
+        self.last_send_time = None
+        self.last_metrics_export = self.clock.now()
+        self.clock.sleep(self.config.initial_delay)
+        stop_reason = "done"
         
         try:
             if test_mode == 'burst':
@@ -402,41 +460,172 @@ class QuoteBot:
                 self.run_normal_mode()
                 
         except KeyboardInterrupt:
+            stop_reason = "interrupted"
             print("\nBot stopped by user")
             if self.logger:
                 self.logger.info("Bot stopped by user")
         except Exception as e:
+            stop_reason = f"error: {e}"
             print(f"Error occurred: {e}")
             if self.logger:
                 self.logger.error(f"Bot error: {e}")
+        
+        if self.logger:
+            self.logger.info(f"Bot stopped: {stop_reason}")
+        if self.timeline is not None:
+            self.timeline.record("stop", mode=test_mode, reason=stop_reason)
+        self.export_metrics()
+        if self.log_listener is not None:
+            self.log_listener.flush()
+    
+    def dry_run(self, mode=None, timeline_file=None):
+        """Run a test mode on a virtual clock into memory, at CPU speed"""
+        saved = (self.clock, self.sink, self.timeline, self.config, self.sampler, self.metrics, self.logger)
+        self.clock = SimulatedClock()
+        self.sink = MemorySink()
+        self.timeline = Timeline(self.clock)
+        # Dry runs don't use up the persisted no-repeat cycle
+        self.sampler = ShuffleBag(len(self.quotes), self.config.quote_seed)
+        # The timeline is the record of a dry run: the real log and metrics
+        # file would count it as a run that actually sent messages
+        self.metrics = BotMetrics()
+        self.logger = None
+        # Not saved: these only apply to this run
+        self.overrides = {"metrics_file": None}
+        if mode:
+            self.overrides["test_mode"] = mode
+        self.config = self.config.replace(**self.overrides)
+        
+        try:
+            self.run()
+            timeline = self.timeline
+        finally:
+            (self.clock, self.sink, self.timeline, self.config, self.sampler, self.metrics,
+             self.logger) = saved
+            self.overrides = {}
+        
+        if timeline_file:
+            timeline.write_jsonl(timeline_file)
+            print(f"Wrote {len(timeline.events)} events to {timeline_file}")
+        return timeline
     
     def run_normal_mode(self):
         """Original normal message sending mode"""
         message_count = 0
-        max_messages = self.config['max_messages']
         
-        while message_count < max_messages:
+        while message_count < self.config.max_messages:
+            config = self.refresh_config()
+            max_messages = config.max_messages
             quote = self.get_random_quote()
-            message = self.config['message_prefix'] + quote
+            message = config.message_prefix + quote
             
             if self.send_message(message):
                 message_count += 1
                 if self.logger:
                     self.logger.info(f"Sent message {message_count}/{max_messages}: {quote[:50]}...")
-                print(f"Sent message {message_count}/{max_messages}")
+                self.echo(f"Sent message {message_count}/{max_messages}")
             
             # Random delay between messages
-            delay = random.uniform(self.config['min_delay'], self.config['max_delay'])
-            time.sleep(delay)
+            delay = self.random.uniform(config.min_delay, config.max_delay)
+            self.clock.sleep(delay)
+    
+    def load_duplicate_index(self):
+        # Loaded from disk on first use; rebuilt if a compaction shifted the indices
+        if self.duplicate_index is None or self.duplicate_generation != self.quotes.generation:
+            if self.duplicate_index is not None:
+                self.duplicate_index.close()
+            self.duplicate_index = MinHashIndex.load(DUPLICATE_FILE, self.quotes,
+                                                     self.config.duplicate_threshold)
+            self.duplicate_generation = self.quotes.generation
+            self.duplicate_saved = len(self.duplicate_index)
+        return self.duplicate_index
+    
+    def find_duplicates(self, quote):
+        """Existing quotes that look like near-duplicates of quote"""
+        index = self.load_duplicate_index()
+        return [(self.quotes[i], score) for i, score in index.query(quote)
+                if self.quotes.is_live(i)]
+    
+    def save_duplicate_index(self):
+        """Persist quotes indexed since the index was loaded"""
+        # An import that failed part way can leave ids that were never added
+        if (self.duplicate_index is not None and self.duplicate_generation == self.quotes.generation
+                and self.duplicate_saved != len(self.duplicate_index) <= len(self.quotes)):
+            self.duplicate_index.save(DUPLICATE_FILE, self.quotes)
+            self.duplicate_saved = len(self.duplicate_index)
+    
+    def index_new_quotes(self, start):
+        if self.weighted_sampler is not None and self.weighted_generation == self.quotes.generation:
+            for i in range(start, len(self.quotes)):
+                quote = self.quotes[i]
+                if self.config.author_weight_power:
+                    self.author_counts[split_quote(quote)[1]] += 1
+                self.weighted_sampler.add(self.quote_weight(quote))
+        if self.duplicate_index is not None and self.duplicate_generation == self.quotes.generation:
+            self.duplicate_index.add_from(self.quotes)
+        if self.search_index is not None and self.search_generation == self.quotes.generation:
+            self.search_index.add_from(self.quotes, start)
     
-    def add_quote(self, quote):
+    def search_quotes(self, query, limit=10):
+        """Quotes matching words, "a phrase" or author:name, best first"""
+        # Loaded from disk on first use; rebuilt if a compaction shifted the indices
+        if self.search_index is None or self.search_generation != self.quotes.generation:
+            self.search_index = QuoteSearchIndex.load(SEARCH_FILE, self.quotes)
+            self.search_generation = self.quotes.generation
+            self.search_saved = len(self.search_index)
+        return [self.quotes[i] for i in self.search_index.search(self.quotes, query, limit)]
+    
+    def save_search_index(self):
+        """Persist quotes indexed since the index was loaded"""
+        if (self.search_index is not None and self.search_generation == self.quotes.generation
+                and len(self.search_index) != self.search_saved):
+            self.search_index.save(SEARCH_FILE, self.quotes)
+            self.search_saved = len(self.search_index)
+    
+    def show_search(self, query, limit=10):
+        results = self.search_quotes(query, limit)
+        for quote in results:
+            print(f"  {quote}")
+        print(f"{len(results)} matching quotes" if results else "No matching quotes")
+    
+    def add_quote(self, quote, check_duplicates=True):
         """Add a new quote to the collection"""
+        if check_duplicates:
+            for existing, score in self.find_duplicates(quote)[:3]:
+                print(f"Possible near-duplicate ({score:.0%}): {existing}")
+        # Journaled: one appended line, folded into the corpus on compaction
         self.quotes.append(quote)
-        # Save to file
-        with open('quotes.json', 'w') as f:
-            json.dump(self.quotes, f, indent=2)
+        self.sampler.add(len(self.quotes) - 1)
+        self.index_new_quotes(len(self.quotes) - 1)
         print(f"Added quote: {quote}")
     
+    def remove_quote(self, quote):
+        """Remove every copy of a quote from the collection"""
+        self.quotes.remove(quote)
+        print(f"Removed quote: {quote}")
+    
+    def import_quotes(self, path, check_duplicates=True):
+        """Bulk import quotes from a JSON list or a text file (one per line)"""
+        quotes = [quote for quote in read_quote_file(path) if quote]
+        flagged = 0
+        start = len(self.quotes)
+        if check_duplicates:
+            duplicates = self.load_duplicate_index()
+            for offset, quote in enumerate(quotes):
+                signature = duplicates.signature(quote)
+                if any(key >= start or self.quotes.is_live(key) for key, _ in duplicates.matches(signature)):
+                    flagged += 1
+                # Indexed under the id it's about to get, so repeats within the file are caught too
+                duplicates.add(start + offset, quote, signature)
+        
+        count = self.quotes.extend(quotes)
+        for index in range(start, start + count):
+            self.sampler.add(index)
+        self.index_new_quotes(start)
+        print(f"Imported {count} quotes from {path}")
+        if flagged:
+            print(f"{flagged} of them look like near-duplicates of existing quotes")
+    
     def interactive_mode(self):
         """Interactive mode for managing quotes"""
         while True:
@@ -447,9 +636,12 @@ class QuoteBot:
             print("4. Show config")
             print("5. Edit config")
             print("6. Test Mode Selection")
-            print("7. Exit")
+            print("7. Remove quote")
+            print("8. Import quotes from file")
+            print("9. Search quotes")
+            print("10. Exit")
             
-            choice = input("Enter your choice (1-7): ").strip()
+            choice = input("Enter your choice (1-10): ").strip()
             
             if choice == '1':
                 self.run()
@@ -461,13 +653,32 @@ class QuoteBot:
                 print(f"Random quote: {self.get_random_quote()}")
             elif choice == '4':
                 print("Current configuration:")
-                for key, value in self.config.items():
+                for key, value in self.refresh_config().as_dict().items():
                     print(f"  {key}: {value}")
             elif choice == '5':
                 self.edit_config()
             elif choice == '6':
                 self.select_test_mode()
             elif choice == '7':
+                quote = input("Enter quote to remove: ").strip()
+                if quote:
+                    self.remove_quote(quote)
+            elif choice == '8':
+                path = input("Path to quotes file: ").strip()
+                if os.path.exists(path):
+                    self.import_quotes(path)
+                else:
+                    print(f"File not found: {path}")
+            elif choice == '9':
+                query = input("Search (words, \"a phrase\", author:name): ").strip()
+                if query:
+                    self.show_search(query)
+            elif choice == '10':
+                self.save_search_index()
+                self.save_duplicate_index()
+                self.close_sampler()
+                self.quotes.close()
+                self.close_logging()
                 print("Goodbye!")
                 break
             else:
@@ -493,49 +704,100 @@ class QuoteBot:
         }
         
         if mode_choice in modes:
-            self.config['test_mode'] = modes[mode_choice]
+            self.config = self.refresh_config().replace(test_mode=modes[mode_choice])
             self.save_config()
             print(f"Test mode set to: {modes[mode_choice]}")
             
             # Show relevant settings for selected mode
             if mode_choice == '2':
-                print(f"Burst settings: {self.config.get('burst_count', 5)} messages with {self.config.get('burst_delay', 0.1)}s delay")
+                print(f"Burst settings: {self.config.burst_count} messages with {self.config.burst_delay}s delay")
             elif mode_choice == '3':
-                print(f"Flood settings: {self.config.get('flood_rate', 0.5)}s between messages")
+                print(f"Flood settings: {self.config.flood_rate}s between messages")
             elif mode_choice == '4':
-                print(f"Pattern settings: {self.config.get('pattern_repeat', 3)} repeats per message")
+                print(f"Pattern settings: {self.config.pattern_repeat} repeats per message")
         else:
             print("Invalid choice")
     
     def edit_config(self):
         """Edit configuration interactively"""
+        config = self.refresh_config()
         print("\nCurrent configuration:")
-        for key, value in self.config.items():
+        for key, value in config.as_dict().items():
             print(f"  {key}: {value}")
         
         key = input("\nEnter config key to edit (or press Enter to cancel): ").strip()
-        if key in self.config:
-            current_value = self.config[key]
+        if key in FIELDS:
+            current_value = getattr(config, key)
             new_value = input(f"Enter new value for {key} (current: {current_value}): ").strip()
             
-            # Try to convert to appropriate type
+            # Convert to the setting's type and validate before saving
             try:
-                if isinstance(current_value, bool):
-                    self.config[key] = new_value.lower() in ['true', '1', 'yes', 'on']
-                elif isinstance(current_value, int):
-                    self.config[key] = int(new_value)
-                elif isinstance(current_value, float):
-                    self.config[key] = float(new_value)
-                else:
-                    self.config[key] = new_value
-                
+                self.config = config.replace(**{key: parse_value(key, new_value)})
                 self.save_config()
-                print(f"Updated {key} to {self.config[key]}")
+                print(f"Updated {key} to {getattr(self.config, key)}")
             except ValueError:
                 print(f"Invalid value for {key}")
         elif key:
             print(f"Config key '{key}' not found")
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Quote bot for testing spam detection")
+    commands = parser.add_subparsers(dest="command")
+    add_parser = commands.add_parser("add-quote", help="add one quote")
+    add_parser.add_argument("quote")
+    add_parser.add_argument("--no-duplicate-check", action="store_true")
+    import_parser = commands.add_parser("import", help="bulk import a JSON list or text file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--no-duplicate-check", action="store_true")
+    search_parser = commands.add_parser("search", help='find quotes by words, "a phrase" or author:name')
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+    commands.add_parser("show-config", help="print the current configuration")
+    report_parser = commands.add_parser("log-report", help="summarize runs from quote_bot.log and its rotations")
+    report_parser.add_argument("logs", nargs="*")
+    report_parser.add_argument("--output", help="write the report as .json, or the runs as .csv")
+    report_parser.add_argument("--workers", type=int)
+    mode_parser = commands.add_parser("set-mode", help="set the test mode")
+    mode_parser.add_argument("mode", choices=TEST_MODES)
+    dry_parser = commands.add_parser("dry-run", help="run a mode on a virtual clock")
+    dry_parser.add_argument("mode", nargs="?", choices=TEST_MODES)
+    dry_parser.add_argument("--timeline", default="timeline.jsonl")
+    args = parser.parse_args()
+    
+    # Config-only commands don't need a bot at all
+    if args.command == "log-report":
+        from bot_log_report import main as log_report
+        log_report((args.logs or [ConfigFile().load().log_file])
+                   + (["--output", args.output] if args.output else [])
+                   + (["--workers", str(args.workers)] if args.workers else []))
+        return
+    if args.command == "show-config":
+        for key, value in ConfigFile().load().as_dict().items():
+            print(f"  {key}: {value}")
+        return
+    if args.command == "set-mode":
+        config_file = ConfigFile()
+        config_file.save(config_file.load().replace(test_mode=args.mode))
+        print(f"Test mode set to: {args.mode}")
+        return
+    
     bot = QuoteBot()
-    bot.interactive_mode()
+    try:
+        if args.command == "add-quote":
+            bot.add_quote(args.quote, check_duplicates=not args.no_duplicate_check)
+        elif args.command == "import":
+            bot.import_quotes(args.path, check_duplicates=not args.no_duplicate_check)
+        elif args.command == "search":
+            bot.show_search(args.query, args.limit)
+        elif args.command == "dry-run":
+            bot.dry_run(args.mode, args.timeline)
+        else:
+            bot.interactive_mode()
+    finally:
+        bot.save_search_index()
+        bot.save_duplicate_index()
+        bot.close_sampler()
+        bot.quotes.close()
+
+if __name__ == "__main__":
+    main()
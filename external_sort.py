@@ -0,0 +1,82 @@
+import heapq
+import pickle
+import tempfile
+
+# Rough bytes per row of short strings in a tuple, on top of the text itself
+ROW_OVERHEAD = 170
+BLOCK_ROWS = 512
+MAX_FAN_IN = 64
+
+
+def row_size(row):
+    # Numbers in a row are small next to the overhead; only text is counted
+    return ROW_OVERHEAD + sum(len(field) for field in row if isinstance(field, str))
+
+
+def spill(rows, tmp_dir=None):
+    """Write rows to an anonymous temp file in pickled blocks; returns the file"""
+    run = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(rows), BLOCK_ROWS):
+        pickle.dump(rows[start:start + BLOCK_ROWS], run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def read_run(run):
+    """Rows of a spilled run, one block in memory at a time; closes the file when done"""
+    try:
+        while True:
+            try:
+                block = pickle.load(run)
+            except EOFError:
+                return
+            yield from block
+    finally:
+        run.close()
+
+
+def merge_runs(runs, key, tmp_dir=None):
+    """One sorted iterator over many runs, merging at most MAX_FAN_IN files at once"""
+    while len(runs) > MAX_FAN_IN:
+        # Merge the oldest runs first so equal keys keep their input order
+        merged = []
+        for start in range(0, len(runs), MAX_FAN_IN):
+            group = runs[start:start + MAX_FAN_IN]
+            run = tempfile.TemporaryFile(dir=tmp_dir)
+            block = []
+            for row in heapq.merge(*(read_run(r) for r in group), key=key):
+                block.append(row)
+                if len(block) == BLOCK_ROWS:
+                    pickle.dump(block, run, protocol=pickle.HIGHEST_PROTOCOL)
+                    block = []
+            if block:
+                pickle.dump(block, run, protocol=pickle.HIGHEST_PROTOCOL)
+            run.seek(0)
+            merged.append(run)
+        runs = merged
+    return heapq.merge(*(read_run(run) for run in runs), key=key)
+
+
+def sort_rows(rows, key=None, memory_bytes=64 * 1024 * 1024, tmp_dir=None):
+    """Sorted rows, like sorted(rows, key=key), holding about memory_bytes at a time
+
+    Input that fits the budget is sorted in memory. Larger input is cut into
+    sorted runs that are spilled to temp files and k-way merged lazily.
+    """
+    runs = []
+    batch = []
+    used = 0
+    for row in rows:
+        batch.append(row)
+        used += row_size(row)
+        if used >= memory_bytes:
+            batch.sort(key=key)
+            runs.append(spill(batch, tmp_dir))
+            batch = []
+            used = 0
+    batch.sort(key=key)
+    if not runs:
+        return iter(batch)
+    if batch:
+        runs.append(spill(batch, tmp_dir))
+    return merge_runs(runs, key, tmp_dir)
@@ -2,10 +2,15 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
+import argparse
+import os
 import random
+from ui_output import BatchedOutput
+from ui_tasks import TaskRunner
+from ui_trace import UiMonitor
 
 class ModernInteractiveWindow:
-    def __init__(self):
+    def __init__(self, trace_file=None, stall_ms=100):
         # Set appearance mode and color theme
         ctk.set_appearance_mode("dark")  # "light" or "dark"
         ctk.set_default_color_theme("blue")  # "blue", "green", "dark-blue"
@@ -15,11 +20,43 @@ class ModernInteractiveWindow:
         self.root.title("Modern Interactive Window")
         self.root.geometry("500x400")
         
+        # Opt-in responsiveness tracing: every callback and after() job is timed
+        self.monitor = None
+        self.after = self.root.after
+        if trace_file:
+            self.monitor = UiMonitor(self.root.after, stall_ms=stall_ms, trace_file=trace_file)
+            self.after = self.monitor.after
+        
         # Variables
         self.name_var = ctk.StringVar()
         self.counter = 0
+        # Slow work runs on worker threads; results come back through after()
+        self.tasks = TaskRunner(self.after)
+        self.progress_task = None
+        
+        if self.monitor:
+            with self.monitor.span("setup_ui"):
+                self.setup_ui()
+            self.setup_overlay()
+            self.monitor.start()
+        else:
+            self.setup_ui()
+    
+    def timed(self, callback):
+        """callback, timed by the monitor when tracing is on"""
+        return self.monitor.wrap(callback) if self.monitor else callback
+    
+    def setup_overlay(self):
+        self.overlay = ctk.CTkLabel(self.root, text="", font=ctk.CTkFont(family="Courier", size=11))
+        self.overlay.pack(side="bottom", anchor="e", padx=10)
+        beats = [0]
         
-        self.setup_ui()
+        def refresh(monitor):
+            # About once a second at the default heartbeat
+            beats[0] += 1
+            if beats[0] % 20 == 0:
+                self.overlay.configure(text=monitor.overlay_text())
+        self.monitor.listeners.append(refresh)
     
     def setup_ui(self):
         # Title
@@ -60,7 +97,7 @@ class ModernInteractiveWindow:
         greet_btn = ctk.CTkButton(
             btn_row1, 
             text="👋 Greet Me!", 
-            command=self.greet_user,
+            command=self.timed(self.greet_user),
             width=120,
             height=35
         )
@@ -69,7 +106,7 @@ class ModernInteractiveWindow:
         counter_btn = ctk.CTkButton(
             btn_row1, 
             text="📊 Count Up!", 
-            command=self.increment_counter,
+            command=self.timed(self.increment_counter),
             width=120,
             height=35
         )
@@ -95,6 +132,8 @@ class ModernInteractiveWindow:
             font=ctk.CTkFont(family="Courier", size=12)
         )
         self.text_area.pack(pady=5, fill="both", expand=True)
+        # Writes are batched into one insert per frame and old lines dropped
+        self.output = BatchedOutput(self.text_area, self.after, max_lines=1000)
         
         # Bottom buttons
         bottom_frame = ctk.CTkFrame(main_frame)
@@ -107,7 +146,7 @@ class ModernInteractiveWindow:
         random_btn = ctk.CTkButton(
             btn_row2, 
             text="🎲 Random Quote", 
-            command=self.show_random_quote,
+            command=self.timed(self.show_random_quote),
             width=110,
             height=35
         )
@@ -116,7 +155,7 @@ class ModernInteractiveWindow:
         clear_btn = ctk.CTkButton(
             btn_row2, 
             text="🗑️ Clear", 
-            command=self.clear_output,
+            command=self.timed(self.clear_output),
             width=80,
             height=35,
             fg_color="red",
@@ -128,7 +167,7 @@ class ModernInteractiveWindow:
         theme_btn = ctk.CTkButton(
             btn_row2, 
             text="🌓 Theme", 
-            command=self.toggle_theme,
+            command=self.timed(self.toggle_theme),
             width=80,
             height=35
         )
@@ -137,13 +176,78 @@ class ModernInteractiveWindow:
         quit_btn = ctk.CTkButton(
             btn_row2, 
             text="❌ Quit", 
-            command=self.quit_app,
+            command=self.timed(self.quit_app),
             width=80,
             height=35,
             fg_color="gray",
             hover_color="darkgray"
         )
         quit_btn.pack(side="right", padx=5)
+        
+        # Progress of background work, shown only while a task runs
+        self.progress_frame = ctk.CTkFrame(bottom_frame)
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="", font=ctk.CTkFont(size=12))
+        self.progress_label.pack(side="left", padx=5)
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=200)
+        self.progress_bar.pack(side="left", padx=5, fill="x", expand=True)
+        cancel_btn = ctk.CTkButton(
+            self.progress_frame,
+            text="✖ Cancel",
+            command=self.timed(self.cancel_task),
+            width=80,
+            height=28
+        )
+        cancel_btn.pack(side="right", padx=5)
+    
+    def run_in_background(self, fn, *args, on_done=None, label="Working..."):
+        """Run fn off the mainloop with a progress bar; on_done gets its result"""
+        def finished(result):
+            self.hide_progress(task)
+            if on_done:
+                on_done(result)
+        
+        def failed(error):
+            self.hide_progress(task)
+            self.add_to_output(f"⚠️ {label} failed: {error}\n")
+        
+        task = self.tasks.submit(fn, *args, on_done=finished, on_error=failed,
+                                 on_progress=self.update_progress)
+        self.progress_task = task
+        self.progress_label.configure(text=label)
+        # Quick tasks finish before the bar would just flash on screen
+        self.after(150, self.show_progress, task)
+        return task
+    
+    def show_progress(self, task):
+        if task is not self.progress_task or task.done():
+            return
+        # Indeterminate until the task reports a fraction through task.report()
+        self.progress_bar.configure(mode="indeterminate")
+        self.progress_bar.start()
+        self.progress_frame.pack(pady=(10, 0), fill="x")
+    
+    def update_progress(self, fraction, text):
+        if fraction is not None:
+            if self.progress_bar.cget("mode") != "determinate":
+                self.progress_bar.stop()
+                self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(fraction)
+        if text:
+            self.progress_label.configure(text=text)
+    
+    def hide_progress(self, task):
+        if task is not self.progress_task:
+            return
+        self.progress_task = None
+        self.progress_bar.stop()
+        self.progress_frame.pack_forget()
+    
+    def cancel_task(self):
+        task = self.progress_task
+        if task is not None:
+            task.cancel()
+            self.hide_progress(task)
+            self.add_to_output("✖ Cancelled.\n")
     
     def greet_user(self):
         name = self.name_var.get().strip()
@@ -159,22 +263,23 @@ class ModernInteractiveWindow:
         self.add_to_output(f"📈 Counter increased to {self.counter}\n")
     
     def show_random_quote(self):
-        quotes = [
-            "💡 The only way to do great work is to love what you do. - Steve Jobs",
-            "🚀 Innovation distinguishes between a leader and a follower. - Steve Jobs",
-            "🌟 Life is what happens to you while you're busy making other plans. - John Lennon",
-            "✨ The future belongs to those who believe in the beauty of their dreams. - Eleanor Roosevelt",
-            "🌅 It is during our darkest moments that we must focus to see the light. - Aristotle"
-        ]
-        quote = random.choice(quotes)
-        self.add_to_output(f"{quote}\n\n")
+        self.run_in_background(
+            self.pick_quote,
+            on_done=lambda quote: self.add_to_output(f"💡 {quote}\n\n"),
+            label="Loading quotes..."
+        )
+    
+    def pick_quote(self):
+        # Imported on first use, so the library is parsed on a worker thread
+        # rather than at startup on the mainloop
+        from quote_library import get_library
+        return random.choice(get_library())
     
     def add_to_output(self, text):
-        self.text_area.insert("end", text)
-        self.text_area.see("end")  # Auto-scroll to bottom
+        self.output.write(text)
     
     def clear_output(self):
-        self.text_area.delete("1.0", "end")
+        self.output.clear()
         self.add_to_output("🧹 Output cleared.\n")
     
     def toggle_theme(self):
@@ -185,12 +290,26 @@ class ModernInteractiveWindow:
     
     def quit_app(self):
         if messagebox.askyesno("Quit", "Are you sure you want to quit?"):
+            self.tasks.shutdown()
             self.root.quit()
     
-    def run(self):
-        self.root.mainloop()
+    def run(self, exit_after=None):
+        if exit_after:
+            # For CI under Xvfb: run unattended, then save the trace
+            self.root.after(int(exit_after * 1000), self.root.quit)
+        try:
+            self.root.mainloop()
+        finally:
+            if self.monitor:
+                self.monitor.write()
 
 # Run the application
 if __name__ == "__main__":
-    app = ModernInteractiveWindow()
-    app.run()
+    parser = argparse.ArgumentParser(description="Modern interactive window")
+    parser.add_argument("--trace", default=os.environ.get("UI_TRACE"),
+                        help="write a responsiveness trace (JSON) to this file")
+    parser.add_argument("--stall-ms", type=float, default=100)
+    parser.add_argument("--exit-after", type=float, help="quit after this many seconds")
+    args = parser.parse_args()
+    app = ModernInteractiveWindow(trace_file=args.trace, stall_ms=args.stall_ms)
+    app.run(args.exit_after)
@@ -1,5 +1,13 @@
-name = input("Name? ")
+import sys
 
-file = open("name.txt", "a")
-file.write(f"{name}\n")
-file.close
\ No newline at end of file
+from name_index import NameIndex
+
+index = NameIndex("name.txt")
+if len(sys.argv) > 1:
+    # Bulk insert: python name.py names.txt (or - for stdin), one name per line
+    source = sys.stdin if sys.argv[1] == "-" else open(sys.argv[1])
+    with source:
+        index.add_many(line.rstrip("\n") for line in source)
+else:
+    name = input("Name? ")
+    index.add(name)
@@ -1,9 +1,12 @@
+import sys
+
+from name_index import NameIndex
+
+
 def main():
-    names = []
-    with open("name.txt") as file:
-        for line in file:
-            names.append(line.rstrip().title())
-    for name in sorted(names, reverse=True):
+    # Optional count: python name2.py 10 greets only the first ten
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    for name in NameIndex("name.txt").first(k):
         print(f"Hello, {name}")
 
-main()
\ No newline at end of file
+main()
@@ -0,0 +1,145 @@
+import heapq
+import os
+from bisect import insort
+from itertools import islice
+
+from file_lock import locked
+
+
+def greeting_key(line):
+    """How name2.py shows a stored line"""
+    return line.rstrip().title()
+
+
+class NameIndex:
+    """name.txt plus a persistent sorted run of its names, for name2.py
+
+    name.txt stays an append-only log. The run file holds every name up to
+    a byte offset of the log, already title-cased and sorted in greeting
+    order, so the first k names cost k line reads. Names appended since then
+    are the delta: they're sorted on the fly and merged into the listing, and
+    folded into the run once the delta passes merge_bytes.
+    """
+
+    def __init__(self, log_path="name.txt", index_path=None, merge_bytes=64 * 1024):
+        self.log_path = log_path
+        self.index_path = index_path or log_path + ".idx"
+        self.merge_bytes = merge_bytes
+
+    def add(self, name):
+        self.add_many([name])
+
+    def add_many(self, names):
+        """Append names to the log in one locked write; bulk inserts go through here"""
+        data = "".join(f"{name}\n" for name in names).encode("utf-8")
+        if not data:
+            return
+        with open(self.log_path, "ab+") as log:
+            with locked(log):
+                size = os.fstat(log.fileno()).st_size
+                if size:
+                    log.seek(size - 1)
+                    if log.read(1) != b"\n":
+                        # Finish a hand-edited last line rather than gluing onto it
+                        data = b"\n" + data
+                log.write(data)
+        self.maybe_merge()
+
+    def read_header(self, run):
+        offset, count = run.readline().split()
+        return int(offset), int(count)
+
+    def covered(self):
+        """(offset, count) of the log already in the run"""
+        try:
+            with open(self.index_path, "rb") as run:
+                return self.read_header(run)
+        except FileNotFoundError:
+            return 0, 0
+
+    def delta(self, offset):
+        """Names appended after offset: (names ascending, offset they end at, unterminated last line)
+
+        Only complete lines count towards the offset; a last line without a
+        newline is returned separately so a merge never covers it.
+        """
+        try:
+            with open(self.log_path, "rb") as log:
+                with locked(log, shared=True):
+                    if os.fstat(log.fileno()).st_size < offset:
+                        # The log was truncated or replaced: nothing in the run can be trusted
+                        return None, 0, None
+                    log.seek(offset)
+                    data = log.read()
+        except FileNotFoundError:
+            return [], offset, None
+        end = data.rfind(b"\n") + 1
+        tail = greeting_key(data[end:].decode("utf-8")) if end < len(data) else None
+        lines = data[:end].decode("utf-8").splitlines()
+        return sorted(map(greeting_key, lines)), offset + end, tail
+
+    def names(self, run):
+        return (line.rstrip("\n") for line in run)
+
+    def first(self, k=None):
+        """The first k names in greeting order (all of them when k is None)"""
+        self.maybe_merge()
+        try:
+            run = open(self.index_path, encoding="utf-8")
+        except FileNotFoundError:
+            run = None
+        try:
+            offset = int(run.readline().split()[0]) if run else 0
+            pending, _, tail = self.delta(offset)
+            if pending is None:
+                self.merge(rebuild=True)
+                yield from self.first(k)
+                return
+            if tail is not None:
+                insort(pending, tail)
+            stored = self.names(run) if run else iter(())
+            yield from islice(heapq.merge(stored, reversed(pending), reverse=True), k)
+        finally:
+            if run:
+                run.close()
+
+    def maybe_merge(self):
+        offset, _ = self.covered()
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return
+        if size - offset >= self.merge_bytes or size < offset:
+            self.merge()
+
+    def merge(self, rebuild=False):
+        """Fold the delta into the run; one process at a time, and readers don't wait for it"""
+        with open(self.index_path + ".lock", "a") as lock:
+            with locked(lock):
+                # Another process may have merged while we waited for the lock
+                offset, count = (0, 0) if rebuild else self.covered()
+                pending, end, _ = self.delta(offset)
+                if pending is None:
+                    offset, count = 0, 0
+                    pending, end, _ = self.delta(0)
+                if not pending and end == offset and os.path.exists(self.index_path):
+                    return
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as out:
+                    out.write(f"{end} {count + len(pending)}\n")
+                    if offset:
+                        with open(self.index_path, encoding="utf-8") as run:
+                            self.read_header(run)
+                            merged = heapq.merge(self.names(run), reversed(pending), reverse=True)
+                            out.writelines(f"{name}\n" for name in merged)
+                    else:
+                        out.writelines(f"{name}\n" for name in reversed(pending))
+                os.replace(tmp_path, self.index_path)
+
+    def __len__(self):
+        offset, count = self.covered()
+        pending, _, tail = self.delta(offset)
+        if pending is None:
+            self.merge(rebuild=True)
+            return len(self)
+        return count + len(pending) + (tail is not None)
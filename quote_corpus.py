@@ -0,0 +1,161 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+from array import array
+
+# A corpus is one file so it can be swapped in with a single atomic rename:
+#   magic, quote count n, n+1 little-endian uint64 offsets, then the UTF-8 text.
+# Quote i is text[offset[i]:offset[i+1]]. After the text comes an optional
+# JSON trailer: the stamps of the journals folded into this corpus, and the
+# fingerprints of its first few counts of quotes. (Older corpora have just the
+# comma-separated stamps.)
+MAGIC = b'QCRP'
+HEADER = struct.Struct('<4sQ')
+OFFSET = struct.Struct('<Q')
+SPAN = struct.Struct('<QQ')
+EMPTY_DIGEST = bytes(20)
+CHECKPOINTS = 8
+
+
+def chain_digest(digest, quotes, start, end):
+    """Extend the fingerprint digest of quotes[:start] over quotes[start:end]"""
+    for i in range(start, end):
+        digest = hashlib.sha1(digest + quotes[i].encode('utf-8')).digest()
+    return digest
+
+
+def fingerprint(quotes, count):
+    """Digest of the first count quotes, to tell whether ids still mean the same quotes
+
+    Every quote is chained into it, so any edit shows. Sources that know
+    the digest at some counts (a corpus stores a few) only hash what follows.
+    """
+    if hasattr(quotes, 'fingerprint'):
+        return quotes.fingerprint(count)
+    return chain_digest(EMPTY_DIGEST, quotes, 0, count).hex()
+
+
+class QuoteCorpus:
+    """Quote list backed by an mmap'd, offset-indexed corpus file"""
+
+    def __init__(self, base='quotes'):
+        self.path = base + '.corpus'
+        self.data = None
+        self.count = 0
+        self.text_start = 0
+        self.open()
+
+    @staticmethod
+    def exists(base='quotes'):
+        return os.path.exists(base + '.corpus')
+
+    def open(self):
+        """Map the file; nothing is parsed until a quote is asked for"""
+        self.close()
+        with open(self.path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a quote corpus")
+        self.text_start = HEADER.size + (self.count + 1) * OFFSET.size
+
+    def trailer(self):
+        (end,) = OFFSET.unpack_from(self.data, HEADER.size + self.count * OFFSET.size)
+        trailer = self.data[self.text_start + end:]
+        if trailer.startswith(b'{'):
+            return json.loads(trailer)
+        return {"stamps": trailer.decode('ascii').split(',') if trailer else []}
+
+    def stamps(self):
+        """Stamps of the compacted journals this corpus already includes"""
+        return set(self.trailer()["stamps"])
+
+    def checkpoints(self):
+        """{count: digest} for the counts whose fingerprint was stored when the corpus was written"""
+        return {count: bytes.fromhex(digest) for count, digest in self.trailer().get("checkpoints", [])}
+
+    def fingerprint(self, count):
+        known = self.checkpoints()
+        start = max((c for c in known if c <= count), default=0)
+        return chain_digest(known.get(start, EMPTY_DIGEST), self, start, count).hex()
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("quote index out of range")
+        start, end = SPAN.unpack_from(self.data, HEADER.size + i * OFFSET.size)
+        return self.data[self.text_start + start:self.text_start + end].decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+
+def write_corpus(quotes, base='quotes', stamps=(), checkpoints=()):
+    """Write quotes to base.corpus, replacing any existing corpus atomically
+
+    The fingerprint is stored at the given counts and at the end, so an
+    index saved partway through can be checked without rehashing it all.
+    """
+    path = base + '.corpus'
+    tmp_path = path + '.tmp'
+    text_path = path + '.text.tmp'
+
+    # Stream the text out first; only the offsets are kept in memory
+    offsets = array('Q', [0])
+    wanted = set(checkpoints)
+    digest = EMPTY_DIGEST
+    digests = []
+    with open(text_path, 'wb') as text:
+        for quote in quotes:
+            data = quote.encode('utf-8')
+            text.write(data)
+            offsets.append(text.tell())
+            digest = hashlib.sha1(digest + data).digest()
+            if len(offsets) - 1 in wanted:
+                digests.append((len(offsets) - 1, digest.hex()))
+    count = len(offsets) - 1
+    if not digests or digests[-1][0] != count:
+        digests.append((count, digest.hex()))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    trailer = {"stamps": list(stamps), "checkpoints": digests[-CHECKPOINTS:]}
+    with open(tmp_path, 'wb') as f, open(text_path, 'rb') as text:
+        f.write(HEADER.pack(MAGIC, count))
+        f.write(offsets.tobytes())
+        shutil.copyfileobj(text, f, 1024 * 1024)
+        f.write(json.dumps(trailer).encode('ascii'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.remove(text_path)
+    os.replace(tmp_path, path)
+    return count
+
+
+def convert(json_file='quotes.json', base='quotes'):
+    """One-shot conversion of a quotes.json list into the indexed format"""
+    with open(json_file, 'r') as f:
+        quotes = json.load(f)
+    return write_corpus(quotes, base)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else 'quotes.json'
+    target = sys.argv[2] if len(sys.argv) > 2 else 'quotes'
+    count = convert(source, target)
+    print(f"Converted {count} quotes from {source} to {target}.corpus")
@@ -0,0 +1,350 @@
+import bisect
+import hashlib
+import mmap
+import os
+import pickle
+import random
+import re
+import struct
+import sys
+import zlib
+from array import array
+
+from quote_corpus import QuoteCorpus, fingerprint
+from quote_journal import QuoteStore, read_quote_file
+from quote_library import get_library
+
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD = re.compile(r"[a-z0-9]+")
+DUPLICATE_FILE = 'quotes.minhash'
+# Arrays are saved in native byte order, so the magic records it
+MAGIC = b'QMH' + sys.byteorder[0].encode()
+HEADER = struct.Struct('<4sIIIQI')  # magic, num_perm, bands, seed, count, fingerprint length
+MERGE_EVERY = 4096
+
+
+def align(position):
+    return position + -position % 8
+
+
+def fingerprint_bytes(quotes, count):
+    return fingerprint(quotes, count).encode('ascii')
+
+
+def quote_text(quote):
+    """The part of a quote before its ' - Author' suffix"""
+    return quote.rsplit(' - ', 1)[0]
+
+
+def shingles(quote, k=5):
+    """Character k-grams of the normalized quote text, hashed to 32 bits"""
+    text = " ".join(WORD.findall(quote_text(quote).lower().replace('’', "'")))
+    if len(text) <= k:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + k].encode('utf-8')) for i in range(len(text) - k + 1)}
+
+
+class MinHashIndex:
+    """MinHash signatures bucketed by LSH bands for sub-linear duplicate lookups
+
+    Keys 0..frozen-1 can live in a saved file that is mmap'd, not parsed:
+    their signatures as one flat array, and per band the bucket keys sorted
+    alongside their ids, found by bisection. Keys added since live in dicts
+    and are written to a small side file until there are enough of them to
+    be merged into the main one.
+    """
+
+    def __init__(self, num_perm=32, bands=16, threshold=0.4, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, PRIME), rng.randrange(0, PRIME)) for _ in range(num_perm)]
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.threshold = threshold
+        self.signatures = {}
+        self.buckets = [{} for _ in range(bands)]
+        self.data = None
+        self.views = []
+        self.frozen = 0
+        self.frozen_signatures = None
+        self.frozen_keys = []
+        self.frozen_ids = []
+
+    def __len__(self):
+        return self.frozen + len(self.signatures)
+
+    def signature(self, quote):
+        hashes = shingles(quote)
+        return array('I', [min(((a * h + b) % PRIME) & MAX_HASH for h in hashes)
+                           for a, b in self.perms])
+
+    def signature_of(self, key):
+        if key < self.frozen:
+            return self.frozen_signatures[key * self.num_perm:(key + 1) * self.num_perm]
+        return self.signatures[key]
+
+    def band_keys(self, signature):
+        """One integer per band; bands wider than 64 bits are hashed down"""
+        raw = signature.tobytes()
+        width = 4 * self.rows
+        for band in range(self.bands):
+            chunk = raw[band * width:(band + 1) * width]
+            if width > 8:
+                chunk = hashlib.blake2b(chunk, digest_size=8).digest()
+            yield band, int.from_bytes(chunk, 'little')
+
+    def add(self, key, quote, signature=None):
+        if signature is None:
+            signature = self.signature(quote)
+        self.signatures[key] = signature
+        for band, band_key in self.band_keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return signature
+
+    def add_from(self, quotes):
+        """Index the quotes after the ones already indexed; keys are their ids"""
+        for i in range(len(self), len(quotes)):
+            self.add(i, quotes[i])
+
+    def similarity(self, a, b):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def candidates(self, signature):
+        found = set()
+        for band, band_key in self.band_keys(signature):
+            found.update(self.buckets[band].get(band_key, ()))
+            if self.frozen:
+                keys, ids = self.frozen_keys[band], self.frozen_ids[band]
+                j = bisect.bisect_left(keys, band_key)
+                while j < len(keys) and keys[j] == band_key:
+                    found.add(ids[j])
+                    j += 1
+        return found
+
+    def query(self, quote, exclude=None):
+        """Keys of indexed quotes similar to quote, most similar first"""
+        return self.matches(self.signature(quote), exclude)
+
+    def matches(self, signature, exclude=None):
+        results = []
+        for key in self.candidates(signature):
+            if key == exclude:
+                continue
+            score = self.similarity(signature, self.signature_of(key))
+            if score >= self.threshold:
+                results.append((key, score))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results
+
+    def groups(self, band):
+        """Keys sharing a bucket in one band, saved and unsaved"""
+        keys, ids = (self.frozen_keys[band], self.frozen_ids[band]) if self.frozen else ((), ())
+        overlay = self.buckets[band]
+        j = 0
+        while j < len(keys):
+            end = j + 1
+            while end < len(keys) and keys[end] == keys[j]:
+                end += 1
+            yield list(ids[j:end]) + overlay.get(keys[j], [])
+            j = end
+        for band_key, group in overlay.items():
+            if not keys or not self.frozen_has(band, band_key):
+                yield group
+
+    def frozen_has(self, band, band_key):
+        keys = self.frozen_keys[band]
+        j = bisect.bisect_left(keys, band_key)
+        return j < len(keys) and keys[j] == band_key
+
+    def clusters(self):
+        """Groups of keys that are near-duplicates of each other"""
+        parent = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        # Only keys sharing a bucket are ever compared, never all pairs
+        for band in range(self.bands):
+            for keys in self.groups(band):
+                if len(keys) < 2:
+                    continue
+                first = self.signature_of(keys[0])
+                for key in keys[1:]:
+                    if self.similarity(first, self.signature_of(key)) >= self.threshold:
+                        parent[find(key)] = find(keys[0])
+
+        groups = {}
+        for key in list(parent):
+            groups.setdefault(find(key), []).append(key)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    def open(self, path, quotes):
+        """Map a saved index if it was built with these parameters and still matches quotes"""
+        self.close()
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        try:
+            magic, num_perm, bands, seed, count, length = HEADER.unpack_from(data, 0)
+            if (magic != MAGIC or (num_perm, bands, seed) != (self.num_perm, self.bands, self.seed)
+                    or count > len(quotes)
+                    or data[HEADER.size:HEADER.size + length] != fingerprint_bytes(quotes, count)):
+                data.close()
+                return False
+        except struct.error:
+            data.close()
+            return False
+
+        base = memoryview(data)
+        position = align(HEADER.size + length)
+        size = 4 * num_perm * count
+        self.frozen_signatures = base[position:position + size].cast('I')
+        position = align(position + size)
+        self.frozen_keys, self.frozen_ids = [], []
+        for _ in range(bands):
+            self.frozen_keys.append(base[position:position + 8 * count].cast('Q'))
+            position += 8 * count
+            self.frozen_ids.append(base[position:position + 4 * count].cast('I'))
+            position = align(position + 4 * count)
+        self.views = [self.frozen_signatures, *self.frozen_keys, *self.frozen_ids, base]
+        self.data = data
+        self.frozen = count
+        return True
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.views = []
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.frozen = 0
+        self.frozen_signatures = None
+        self.frozen_keys, self.frozen_ids = [], []
+
+    def save(self, path, quotes):
+        """Persist the index; few new keys go to a side file, many are merged into the main one"""
+        if len(self.signatures) >= MERGE_EVERY or not os.path.exists(path):
+            self.write_main(path, quotes)
+        else:
+            self.write_delta(path, quotes)
+
+    def write_delta(self, path, quotes):
+        tmp_path = path + '.delta.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({"start": self.frozen, "fingerprint": fingerprint_bytes(quotes, len(self)),
+                         "signatures": {key: sig.tobytes() for key, sig in self.signatures.items()}},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path + '.delta')
+
+    def write_main(self, path, quotes):
+        count = len(self)
+        prints = fingerprint_bytes(quotes, count)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.num_perm, self.bands, self.seed, count, len(prints)))
+            f.write(prints)
+            f.write(bytes(-f.tell() % 8))
+            if self.frozen:
+                f.write(self.frozen_signatures)
+            for key in range(self.frozen, count):
+                f.write(self.signatures[key])
+            f.write(bytes(-f.tell() % 8))
+            for band in range(self.bands):
+                # The new entries are few: splice them into the saved run with
+                # bulk copies instead of re-sorting everything
+                added = sorted((band_key, key) for band_key, keys in self.buckets[band].items() for key in keys)
+                keys = self.frozen_keys[band] if self.frozen else memoryview(b'').cast('Q')
+                ids = self.frozen_ids[band] if self.frozen else memoryview(b'').cast('I')
+                positions = [bisect.bisect_right(keys, band_key) for band_key, _ in added]
+                for column, values, kind in ((keys, [k for k, _ in added], 'Q'), (ids, [i for _, i in added], 'I')):
+                    previous = 0
+                    for position, value in zip(positions, values):
+                        f.write(column[previous:position])
+                        f.write(array(kind, [value]))
+                        previous = position
+                    f.write(column[previous:])
+                f.write(bytes(-f.tell() % 8))
+            f.flush()
+            os.fsync(f.fileno())
+        # The old file must be unmapped before it is replaced
+        self.close()
+        os.replace(tmp_path, path)
+        if os.path.exists(path + '.delta'):
+            os.remove(path + '.delta')
+        self.signatures = {}
+        self.buckets = [{} for _ in range(self.bands)]
+        self.open(path, quotes)
+
+    def load_delta(self, path, quotes):
+        """Add the keys saved in the side file, if it still extends the main file"""
+        try:
+            with open(path + '.delta', 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        count = saved["start"] + len(saved["signatures"])
+        if saved["start"] != self.frozen or count > len(quotes) or saved["fingerprint"] != fingerprint_bytes(quotes, count):
+            return
+        for key in sorted(saved["signatures"]):
+            signature = array('I')
+            signature.frombytes(saved["signatures"][key])
+            self.add(key, None, signature)
+
+    @classmethod
+    def load(cls, path, quotes, threshold=0.4):
+        """The saved index if it still matches quotes, extended with new ones; else rebuilt"""
+        index = cls(threshold=threshold)
+        index.open(path, quotes)
+        index.load_delta(path, quotes)
+        indexed = len(index)
+        index.add_from(quotes)
+        if len(index) != indexed:
+            index.save(path, quotes)
+        return index
+
+
+def build_index(quotes, threshold=0.4):
+    index = MinHashIndex(threshold=threshold)
+    index.add_from(quotes)
+    return index
+
+
+def load_quotes(path=None):
+    """Quotes from a file, or the bot's corpus plus journal, or the built-in list"""
+    if path:
+        return read_quote_file(path)
+    if QuoteCorpus.exists('quotes'):
+        return QuoteStore(QuoteCorpus('quotes'))
+    if os.path.exists('quotes.json'):
+        return QuoteStore(read_quote_file('quotes.json'))
+    return QuoteStore(get_library())
+
+
+def report(quotes, threshold=0.4):
+    """Print clusters of near-duplicate quotes"""
+    index = build_index(quotes, threshold)
+    clusters = index.clusters()
+    for number, cluster in enumerate(clusters, 1):
+        print(f"\nCluster {number}:")
+        for key in cluster:
+            print(f"  [{key}] {quotes[key]}")
+    print(f"\n{len(clusters)} clusters of near-duplicates in {len(quotes)} quotes")
+    return clusters
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.4
+    report(load_quotes(source), threshold)
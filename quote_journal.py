@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+
+from quote_corpus import EMPTY_DIGEST, QuoteCorpus, chain_digest, write_corpus
+
+
+class QuoteJournal:
+    """Append-only log of added and removed quotes, one JSON object per line"""
+
+    def __init__(self, path='quotes.journal'):
+        self.path = path
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, op, quote):
+        """Record a single 'add' or 'remove'"""
+        self.append_many([(op, quote)])
+
+    def append_many(self, entries):
+        """Record many entries with a single write and a single fsync"""
+        data = "".join(json.dumps({"op": op, "quote": quote}, ensure_ascii=False) + "\n"
+                       for op, quote in entries).encode('utf-8')
+        if not data:
+            return
+        with open(self.path, 'ab+') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    # A crash cut the last line short; don't glue our first entry onto it
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self, path=None):
+        """Yield (op, quote) pairs in the order they were written"""
+        path = path or self.path
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    # A line torn by a crash mid-append; what was written after it still counts
+                    continue
+                yield entry["op"], entry["quote"]
+
+
+class QuoteStore:
+    """Quote list made of a base corpus plus the replayed journal
+
+    Removed quotes stay in place as tombstones until the next compaction so
+    indices handed out to the sampler remain valid.
+    """
+
+    def __init__(self, base, base_name='quotes', journal=None, compact_bytes=1024 * 1024):
+        self.base = base
+        self.base_name = base_name
+        self.journal = journal or QuoteJournal(base_name + '.journal')
+        self.compact_bytes = compact_bytes
+        # Bumped whenever a compaction drops tombstones and shifts indices
+        self.generation = 0
+        self.added = []
+        self.removed = set()
+        self.lock = threading.Lock()
+        self.compactor = None
+        # Fingerprint digests already worked out, by count; see fingerprint()
+        self.known = self.base_checkpoints()
+
+        # Journals moved aside by a compaction that never finished swapping in
+        # its corpus are replayed; ones the corpus already includes are dropped
+        absorbed = self.base.stamps() if isinstance(self.base, QuoteCorpus) else set()
+        for stamp, path in self.compacting_journals():
+            if stamp in absorbed:
+                os.remove(path)
+                continue
+            for op, quote in self.journal.replay(path):
+                self.apply(op, quote)
+        for op, quote in self.journal.replay():
+            self.apply(op, quote)
+
+    def compacting_journals(self):
+        """(stamp, path) of journals moved aside for compaction, oldest first"""
+        legacy = self.journal.path + '.compacting'
+        if os.path.exists(legacy):
+            # Written before compactions were stamped
+            os.replace(legacy, self.compacting_path(self.new_stamp()))
+        directory, name = os.path.split(self.journal.path)
+        prefix = name + '.compacting.'
+        stamps = sorted(entry[len(prefix):] for entry in os.listdir(directory or '.') if entry.startswith(prefix))
+        return [(stamp, self.compacting_path(stamp)) for stamp in stamps]
+
+    def compacting_path(self, stamp):
+        return f"{self.journal.path}.compacting.{stamp}"
+
+    def new_stamp(self):
+        # Sorts by creation time, and never collides with another process
+        return f"{time.time_ns():020d}-{os.getpid()}"
+
+    def apply(self, op, quote):
+        if op == 'add':
+            self.added.append(quote)
+            self.removed.discard(quote)
+        elif op == 'remove':
+            self.removed.add(quote)
+
+    def __len__(self):
+        return len(self.base) + len(self.added)
+
+    def base_checkpoints(self):
+        return self.base.checkpoints() if isinstance(self.base, QuoteCorpus) else {}
+
+    def fingerprint(self, count):
+        """Digest of the first count quotes, chained on from the nearest count already known"""
+        with self.lock:
+            start = max((c for c in self.known if c <= count), default=0)
+            digest = self.known.get(start, EMPTY_DIGEST)
+            base_len = len(self.base)
+            if start < base_len:
+                digest = chain_digest(digest, self.base, start, min(count, base_len))
+                start = min(count, base_len)
+            digest = chain_digest(digest, self.added, start - base_len, count - base_len)
+            self.known[count] = digest
+            return digest.hex()
+
+    def __getitem__(self, i):
+        with self.lock:
+            if i < 0:
+                i += len(self)
+            if i < len(self.base):
+                return self.base[i]
+            return self.added[i - len(self.base)]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def is_live(self, i):
+        return not self.removed or self[i] not in self.removed
+
+    def append(self, quote):
+        """Add one quote: a single journal line instead of a full rewrite"""
+        self.record([('add', quote)])
+
+    def remove(self, quote):
+        self.record([('remove', quote)])
+
+    def extend(self, quotes):
+        """Bulk import: every quote goes into the journal with one fsync"""
+        quotes = [q for q in quotes if q]
+        self.record([('add', q) for q in quotes])
+        return len(quotes)
+
+    def record(self, entries):
+        # Journal line and in-memory state change together, never split by a compaction
+        with self.lock:
+            self.journal.append_many(entries)
+            for op, quote in entries:
+                self.apply(op, quote)
+        self.maybe_compact()
+
+    def maybe_compact(self):
+        if self.journal.size() >= self.compact_bytes:
+            self.compact(background=True)
+
+    def compact(self, background=False):
+        """Fold the journal into the indexed corpus with an atomic swap"""
+        if self.compactor is not None and self.compactor.is_alive():
+            return
+        if background:
+            self.compactor = threading.Thread(target=self.run_compaction, daemon=True)
+            self.compactor.start()
+        else:
+            self.run_compaction()
+
+    def run_compaction(self):
+        # Move the journal aside so new adds keep landing in a fresh one
+        with self.lock:
+            if os.path.exists(self.journal.path):
+                os.replace(self.journal.path, self.compacting_path(self.new_stamp()))
+            # Includes any left over by an earlier crash: they were replayed into memory
+            folded = self.compacting_journals()
+            snapshot_len = len(self.added)
+            removed = set(self.removed)
+            # Counts saved indexes were checked at, so they can be checked cheaply again
+            checkpoints = sorted(self.known)
+
+        quotes = [q for q in self.snapshot(snapshot_len) if q not in removed]
+        tmp_base = self.base_name + '.compact'
+        # The stamps make the swap idempotent: once this corpus is in place,
+        # the journals it names are never replayed again, even if a crash
+        # leaves them on disk
+        write_corpus(quotes, tmp_base, [stamp for stamp, _ in folded], checkpoints)
+
+        with self.lock:
+            # The mapped corpus must be released before its files are replaced
+            if isinstance(self.base, QuoteCorpus):
+                self.base.close()
+            os.replace(tmp_base + '.corpus', self.base_name + '.corpus')
+            self.base = QuoteCorpus(self.base_name)
+            self.added = self.added[snapshot_len:]
+            self.known = self.base_checkpoints()
+            self.removed -= removed
+            if removed:
+                self.generation += 1
+            for _, path in folded:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def snapshot(self, added_len):
+        for i in range(len(self.base)):
+            yield self.base[i]
+        for quote in self.added[:added_len]:
+            yield quote
+
+    def close(self):
+        """Wait for a running compaction to finish"""
+        if self.compactor is not None:
+            self.compactor.join()
+
+
+def read_quote_file(path):
+    """Read quotes for a bulk import: a JSON list or one quote per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip()]
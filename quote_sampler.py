@@ -0,0 +1,311 @@
+import mmap
+import os
+import random
+import re
+import struct
+import time
+from array import array
+
+from quote_corpus import fingerprint
+
+# magic, number of quotes tracked, and a fingerprint of the first
+# fingerprinted quotes, checked when reopening; then one bit per quote
+USED_HEADER = struct.Struct('<4sQQ20s')
+USED_MAGIC = b'QUSD'
+NOT_FULL = re.compile(rb'[^\xff]')
+
+
+class ShuffleBag:
+    """Hand out indices 0..n-1 in random order, each once per cycle"""
+
+    def __init__(self, size=0, seed=None):
+        self.random = random.Random(seed)
+        self.size = size
+        # Built on first draw so creating a bag over a big corpus is free
+        self.pool = None
+        self.remaining = size
+
+    def __len__(self):
+        return self.size
+
+    def draw(self):
+        """Return the next index of the current cycle in O(1)"""
+        if not self.size:
+            raise IndexError("draw from an empty bag")
+        if self.pool is None:
+            self.pool = array('q', range(self.size))
+
+        # Start a new cycle once every index has been handed out
+        if self.remaining == 0:
+            self.remaining = self.size
+
+        # Lazy Fisher-Yates: swap a random pick to the end of the unused region
+        last = self.remaining - 1
+        pick = self.random.randint(0, last)
+        pool = self.pool
+        pool[pick], pool[last] = pool[last], pool[pick]
+        self.remaining = last
+        return pool[last]
+
+    def add(self, index):
+        """Add a new index so it can still come up in the current cycle"""
+        self.size += 1
+        self.remaining += 1
+        if self.pool is None:
+            return
+        pool = self.pool
+        pool.append(index)
+        end = self.size - 1
+        slot = self.remaining - 1
+        pool[slot], pool[end] = pool[end], pool[slot]
+
+    def reset(self):
+        """Start a fresh cycle"""
+        self.remaining = self.size
+
+
+class PersistentBag:
+    """A ShuffleBag whose cycle survives restarts: one bit per quote in an mmap'd file
+
+    Picks are uniform over the quotes not used yet this cycle. While at least
+    1/64 of them are left, random probing of the bitset finds one in a few
+    tries; the tail of the cycle is served from a list of the leftovers.
+    The file is only created or mapped on the first draw, so commands that
+    never pick a quote leave none behind.
+    """
+
+    def __init__(self, path, quotes, seed=None, flush_interval=5.0):
+        self.random = random.Random(seed)
+        self.path = path
+        self.quotes = quotes
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.leftovers = None
+        self.data = None
+        self.size = 0
+
+    def open(self, quotes):
+        """Map the file, starting a fresh cycle if it was made for other quotes"""
+        size = len(quotes)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < USED_HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(USED_HEADER.pack(USED_MAGIC, 0, 0, self.digest(quotes, 0)))
+        with open(self.path, 'r+b') as f:
+            self.data = mmap.mmap(f.fileno(), 0)
+        magic, tracked, fingerprinted, digest = USED_HEADER.unpack_from(self.data, 0)
+        if (magic != USED_MAGIC or tracked > size or fingerprinted > tracked
+                or digest != self.digest(quotes, fingerprinted)):
+            tracked = 0
+            self.clear()
+        self.size = tracked
+        # Counted here rather than stored, so a draw only ever writes one byte
+        self.used = int.from_bytes(self.bitmap(), 'little').bit_count()
+        self.grow(size)
+        # Quotes added later are journaled, so their ids stay put until a compaction
+        # drops removed quotes, which changes the fingerprinted ones too
+        self.fingerprinted = size
+        self.digest_value = self.digest(quotes, size)
+        self.write_header()
+
+    @staticmethod
+    def digest(quotes, count):
+        return bytes.fromhex(fingerprint(quotes, count))
+
+    def write_header(self):
+        USED_HEADER.pack_into(self.data, 0, USED_MAGIC, self.size, self.fingerprinted, self.digest_value)
+
+    def bitmap(self):
+        start = USED_HEADER.size
+        return self.data[start:start + (self.size + 7) // 8]
+
+    def clear(self):
+        self.data[USED_HEADER.size:] = bytes(len(self.data) - USED_HEADER.size)
+
+    def grow(self, size):
+        """Track quotes up to size; new ones start unused"""
+        needed = USED_HEADER.size + (size + 7) // 8
+        if needed > len(self.data):
+            # Grow with slack so appending quotes rarely remaps
+            self.data.resize(max(needed, USED_HEADER.size + 2 * (len(self.data) - USED_HEADER.size), 4096))
+        if self.leftovers is not None:
+            self.leftovers.extend(range(self.size, size))
+        self.size = size
+
+    def __len__(self):
+        return self.size if self.data is not None else len(self.quotes)
+
+    def is_used(self, index):
+        return self.data[USED_HEADER.size + (index >> 3)] >> (index & 7) & 1
+
+    def mark(self, index):
+        offset = USED_HEADER.size + (index >> 3)
+        self.data[offset] |= 1 << (index & 7)
+        self.used += 1
+
+    def draw(self):
+        """Return an index not used yet this cycle"""
+        if self.data is None:
+            self.open(self.quotes)
+        if not self.size:
+            raise IndexError("draw from an empty bag")
+        if self.used >= self.size:
+            self.reset()
+
+        if self.leftovers is None and (self.size - self.used) * 64 < self.size:
+            # Collect the last few unused indices once per cycle
+            leftovers = self.leftovers = array('q')
+            size = self.size
+            for match in NOT_FULL.finditer(self.bitmap()):
+                byte, base = match.group()[0], match.start() * 8
+                leftovers.extend(i for i in range(base, min(base + 8, size)) if not byte >> (i - base) & 1)
+
+        if self.leftovers is None:
+            randrange = self.random.randrange
+            while True:
+                index = randrange(self.size)
+                if not self.is_used(index):
+                    break
+        else:
+            leftovers = self.leftovers
+            pick = self.random.randrange(len(leftovers))
+            leftovers[pick], leftovers[-1] = leftovers[-1], leftovers[pick]
+            index = leftovers.pop()
+
+        self.mark(index)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+        return index
+
+    def add(self, index):
+        """Track a newly added quote so it can still come up this cycle"""
+        if self.data is None:
+            # Opening the file later covers every quote there is by then
+            return
+        self.grow(index + 1)
+        self.write_header()
+
+    def reset(self):
+        """Start a fresh cycle"""
+        if self.data is None:
+            self.open(self.quotes)
+        self.clear()
+        self.used = 0
+        self.leftovers = None
+        self.write_header()
+
+    def flush(self):
+        if self.data is not None:
+            self.data.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.data is not None:
+            self.flush()
+            self.data.close()
+            self.data = None
+
+
+class AliasSampler:
+    """Weighted draws in O(1) with Walker's alias method
+
+    Weights can change without rebuilding the table: lowering a weight only
+    changes how often its draws are accepted, until the total falls below
+    half of what the table was built for, and raised or new weights wait in
+    a small pending set until enough pile up to rebuild (amortized O(1)).
+    """
+
+    def __init__(self, weights=(), seed=None):
+        self.random = random.Random(seed)
+        self.weights = array('d', weights)
+        self.total = sum(self.weights)
+        self.build()
+
+    def __len__(self):
+        return len(self.weights)
+
+    def build(self):
+        """Vose's alias table over the current weights, O(n)"""
+        n = len(self.weights)
+        # ceiling: each index's share when the table was built; accepted: the
+        # part of its current weight still drawn through the table
+        self.ceiling = array('d', self.weights)
+        self.accepted = array('d', self.weights)
+        self.table_total = sum(self.ceiling)
+        # Resummed so updates don't accumulate rounding error
+        self.total = self.table_total
+        self.prob = array('d', bytes(8 * n))
+        self.alias = array('q', bytes(8 * n))
+        self.pending = []
+        self.pending_set = set()
+        self.pending_max = 0.0
+        if not self.table_total:
+            return
+        scale = n / self.table_total
+        scaled = array('d', (w * scale for w in self.ceiling))
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        prob, alias = self.prob, self.alias
+        while small and large:
+            s, l = small.pop(), large[-1]
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(large.pop())
+        # Leftovers are 1.0 up to rounding
+        for i in small + large:
+            prob[i] = 1.0
+
+    def draw(self):
+        """A random index, each with probability weight / total"""
+        if self.total <= 0:
+            raise IndexError("draw with no positive weights")
+        rng = self.random
+        n_table = len(self.ceiling)
+        table_total = self.table_total
+        pending_mass = len(self.pending) * self.pending_max
+        while True:
+            # Table and pending set are each sampled against a ceiling and
+            # retried on rejection, which keeps draws exactly proportional
+            if rng.random() * (table_total + pending_mass) < table_total:
+                i = rng.randrange(n_table)
+                if rng.random() >= self.prob[i]:
+                    i = self.alias[i]
+                if rng.random() * self.ceiling[i] < self.accepted[i]:
+                    return i
+            else:
+                i = self.pending[rng.randrange(len(self.pending))]
+                if rng.random() * self.pending_max < self.weights[i]:
+                    return i
+
+    def set_weight(self, index, weight):
+        """Change one weight; index == len(self) appends a new one"""
+        if weight < 0:
+            raise ValueError("weights must not be negative")
+        if index == len(self.weights):
+            self.weights.append(0.0)
+        self.total += weight - self.weights[index]
+        self.weights[index] = weight
+        if index in self.pending_set:
+            self.pending_max = max(self.pending_max, weight)
+        elif index < len(self.ceiling) and weight <= self.ceiling[index]:
+            self.accepted[index] = weight
+        else:
+            if index < len(self.ceiling):
+                # Raised above its table share: draw it from the pending set instead
+                self.accepted[index] = 0.0
+            self.pending.append(index)
+            self.pending_set.add(index)
+            self.pending_max = max(self.pending_max, weight)
+            if len(self.pending) > max(16, len(self.weights) // 16):
+                self.build()
+                return
+        if self.total < self.table_total / 2:
+            # Most of the table's mass is gone, so most table draws would be rejected
+            self.build()
+
+    def add(self, weight):
+        """Append a new index with the given weight and return it"""
+        index = len(self.weights)
+        self.set_weight(index, weight)
+        return index
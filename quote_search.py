@@ -0,0 +1,153 @@
+import bisect
+import heapq
+import os
+import pickle
+import re
+from array import array
+
+from quote_corpus import fingerprint
+from quote_library import split_quote
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# A "quoted phrase" (optionally author:"full name"; a missing closing quote
+# runs to the end) or a bare term. Apostrophes are left alone: they're contractions.
+QUERY_TERM = re.compile(r'(author:)?"([^"]*)"?|(\S+)', re.IGNORECASE)
+SEARCH_FILE = 'quotes.search'
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower().replace('’', "'"))
+
+
+class QuoteSearchIndex:
+    """Inverted index from words and authors to quote ids"""
+
+    def __init__(self):
+        self.words = {}
+        self.authors = {}
+        self.lengths = array('H')
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, quote):
+        """Index one quote; ids must be added in increasing order"""
+        while len(self.lengths) < doc_id:
+            self.lengths.append(0)
+        text, author = split_quote(quote)
+        tokens = tokenize(text)
+        self.lengths.append(min(len(tokens), 65535))
+        for token in set(tokens):
+            self.words.setdefault(token, array('I')).append(doc_id)
+        for token in set(tokenize(author)):
+            self.authors.setdefault(token, array('I')).append(doc_id)
+
+    def add_from(self, quotes, start=None):
+        for i in range(len(self) if start is None else start, len(quotes)):
+            self.add(i, quotes[i])
+
+    @staticmethod
+    def intersect(postings):
+        """Ids found in every posting list, smallest list first"""
+        if not postings:
+            return set()
+        postings = sorted(postings, key=len)
+        found = set(postings[0])
+        for posting in postings[1:]:
+            if not found:
+                break
+            if len(posting) > 8 * len(found):
+                # Probe a big sorted list instead of turning it into a set
+                found = {i for i in found
+                         if (j := bisect.bisect_left(posting, i)) < len(posting) and posting[j] == i}
+            else:
+                found &= set(posting)
+        return found
+
+    def parse(self, query):
+        """Split a query into words, "quoted phrases" and author:name terms"""
+        words, phrases, authors = [], [], []
+        for author, quoted, bare in QUERY_TERM.findall(query):
+            if bare.lower().startswith('author:'):
+                authors.extend(tokenize(bare[7:]))
+                continue
+            tokens = tokenize(bare or quoted)
+            if author:
+                authors.extend(tokens)
+            elif len(tokens) > 1 and not bare:
+                phrases.append(tokens)
+            else:
+                words.extend(tokens)
+        return words, phrases, authors
+
+    def search(self, quotes, query, limit=10):
+        """Ids of quotes matching every term, shortest (most focused) matches first"""
+        words, phrases, authors = self.parse(query)
+        postings = [self.words.get(word, ()) for word in words]
+        # The phrase check below verifies every word, so the rarest one finds candidates
+        postings += [min((self.words.get(word, ()) for word in phrase), key=len)
+                     for phrase in phrases if phrase]
+        postings += [self.authors.get(name, ()) for name in authors]
+        if not postings:
+            return []
+        # A single term needs no intersection: rank its posting list as is
+        candidates = postings[0] if len(postings) == 1 else self.intersect(postings)
+        rank = self.lengths.__getitem__
+        if not phrases:
+            live = getattr(quotes, 'is_live', None)
+            if live is None or not quotes.removed:
+                return heapq.nsmallest(limit, candidates, key=rank)
+
+        # Check phrases and removals in rank order, stopping once limit quotes pass
+        wanted = [" " + " ".join(phrase) + " " for phrase in phrases]
+        results = []
+        for i in sorted(candidates, key=rank):
+            if wanted:
+                text = " " + " ".join(tokenize(split_quote(quotes[i])[0])) + " "
+                if not all(phrase in text for phrase in wanted):
+                    continue
+            if hasattr(quotes, 'is_live') and not quotes.is_live(i):
+                continue
+            results.append(i)
+            if len(results) == limit:
+                break
+        return results
+
+    def save(self, path, quotes):
+        """Persist the index with a fingerprint of what it covers, atomically"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({"fingerprint": fingerprint(quotes, len(self)), "index": self}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, quotes):
+        """The saved index if it still matches quotes, extended with new ones; else rebuilt"""
+        index = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    saved = pickle.load(f)
+                candidate = saved["index"]
+                if len(candidate) <= len(quotes) and saved["fingerprint"] == fingerprint(quotes, len(candidate)):
+                    index = candidate
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+                index = None
+        if index is None:
+            index = cls()
+        indexed = len(index)
+        index.add_from(quotes)
+        if len(index) != indexed:
+            index.save(path, quotes)
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+    from quote_dedup import load_quotes
+
+    quotes = load_quotes()
+    index = QuoteSearchIndex.load(SEARCH_FILE, quotes)
+    for i in index.search(quotes, " ".join(sys.argv[1:])):
+        print(f"[{i}] {quotes[i]}")
@@ -0,0 +1,252 @@
+import csv
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from itertools import groupby
+from operator import itemgetter
+
+from external_sort import sort_rows
+
+# A cache file is: header, JSON layout, then 8-byte aligned sections. Each
+# column is dictionary-encoded: its distinct values sorted, as UTF-8 text plus
+# uint64 offsets, and one code per row. The row order sorted by the first
+# column is stored too, so sorted listings need no sorting at all.
+MAGIC = b'RCOL'
+HEADER = struct.Struct('<4sQQQI')  # magic, csv mtime_ns, csv size, rows, layout length
+BLOCK_VALUES = 64 * 1024
+COPY_BYTES = 1024 * 1024
+
+
+def code_type(count):
+    """Smallest array type that can hold codes 0..count-1"""
+    for kind in ('B', 'H', 'I'):
+        if count <= 1 << (8 * array(kind).itemsize):
+            return kind
+    return 'Q'
+
+
+class Column:
+    """One column of the cache; values decode on access, codes are zero-copy"""
+
+    def __init__(self, data, layout):
+        self.name = layout["name"]
+        self.count = layout["dict_count"]
+        self.offsets = memoryview(data)[layout["offsets"]:layout["offsets"] + 8 * (self.count + 1)].cast('Q')
+        self.text = layout["text"]
+        self.data = data
+        kind = layout["code_type"]
+        size = array(kind).itemsize * layout["rows"]
+        self.codes = memoryview(data)[layout["codes"]:layout["codes"] + size].cast(kind)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def value(self, code):
+        start = self.text + self.offsets[code]
+        return self.data[start:self.text + self.offsets[code + 1]].decode('utf-8')
+
+    def values(self):
+        """The distinct values, sorted; code i is values()[i]"""
+        return [self.value(code) for code in range(self.count)]
+
+    def __getitem__(self, i):
+        return self.value(self.codes[i])
+
+    def __iter__(self):
+        # Decoded as they go; a column can be far bigger than memory
+        return (self.value(code) for code in self.codes)
+
+    def release(self):
+        self.offsets.release()
+        self.codes.release()
+
+
+def encode_column(cells, rows, with_order=False):
+    """One column from its (column, value, row) cells, which come sorted by value
+
+    The sorted dictionary goes to temp files as it's read, text and offsets.
+    Returns them with the number of distinct values, each row's code and,
+    when asked for, the rows in value order.
+    """
+    text, offsets = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+    codes = array('I', [0]) * rows
+    order = array('I') if with_order else None
+    ends = array('Q', [0])
+    position = 0
+    previous = None
+    count = 0
+    for _, value, row in cells:
+        if count == 0 or value != previous:
+            data = value.encode('utf-8')
+            text.write(data)
+            position += len(data)
+            ends.append(position)
+            count += 1
+            previous = value
+            if len(ends) >= BLOCK_VALUES:
+                ends.tofile(offsets)
+                del ends[:]
+        codes[row] = count - 1
+        if order is not None:
+            order.append(row)
+    ends.tofile(offsets)
+    kind = code_type(count)
+    if kind != 'I':
+        codes = array(kind, codes)
+    return text, offsets, count, codes, order
+
+
+def build(csv_path, cache_path, memory_bytes=64 * 1024 * 1024):
+    """Parse the CSV once and write its columnar cache atomically, in about memory_bytes
+
+    Every (column, value, row) cell is merge-sorted through disk, so each
+    dictionary comes out sorted and is written as it goes. Only the codes and
+    the row order, a few bytes per row, are held in memory; the sort gets
+    half the budget to leave them room.
+    """
+    stat = os.stat(csv_path)
+    with open(csv_path, newline='') as file:
+        reader = csv.reader(file)
+        names = next(reader)
+        width = len(names)
+        rows = 0
+
+        def cells():
+            nonlocal rows
+            for row in reader:
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                for column, value in zip(range(width), row):
+                    yield column, value, rows
+                rows += 1
+
+        # Stable: equal values keep file order, so the first column's rows come out as the sorted order
+        ordered = sort_rows(cells(), key=itemgetter(0, 1), memory_bytes=memory_bytes // 2)
+
+    encoded = {}
+    for column, cells in groupby(ordered, key=itemgetter(0)):
+        encoded[column] = encode_column(cells, rows, with_order=column == 0)
+
+    sections = []
+    layout = {"columns": []}
+    for column, name in enumerate(names):
+        text, offsets, count, codes, order = encoded.get(column) or encode_column((), rows, column == 0)
+        entry = {"name": name, "rows": rows, "dict_count": count, "code_type": codes.typecode}
+        sections += [(entry, "offsets", offsets), (entry, "text", text), (entry, "codes", codes)]
+        layout["columns"].append(entry)
+        if order is not None:
+            sections.append((layout, "order", order))
+
+    # Offsets depend on the layout's own length, so settle it before writing
+    for entry, key, _ in sections:
+        entry[key] = 0
+    while True:
+        blob = json.dumps(layout).encode('utf-8')
+        position = HEADER.size + len(blob)
+        changed = False
+        for entry, key, payload in sections:
+            position += -position % 8
+            if entry[key] != position:
+                entry[key] = position
+                changed = True
+            position += section_size(payload)
+        if not changed:
+            break
+
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, stat.st_mtime_ns, stat.st_size, rows, len(blob)))
+        f.write(blob)
+        for _, _, payload in sections:
+            f.write(bytes(-f.tell() % 8))
+            if isinstance(payload, array):
+                payload.tofile(f)
+            else:
+                payload.seek(0)
+                shutil.copyfileobj(payload, f, COPY_BYTES)
+                payload.close()
+    os.replace(tmp_path, cache_path)
+
+
+def section_size(payload):
+    """Bytes in a section held as an array or spilled to a temp file"""
+    if isinstance(payload, array):
+        return len(payload) * payload.itemsize
+    return payload.seek(0, os.SEEK_END)
+
+
+class RosterCache:
+    """students.csv as mmap'd columns, rebuilt when the CSV's mtime or size changes"""
+
+    def __init__(self, csv_path, cache_path=None, memory_bytes=64 * 1024 * 1024):
+        self.csv_path = csv_path
+        self.cache_path = cache_path or csv_path + '.cache'
+        self.memory_bytes = memory_bytes
+        self.data = None
+        self.columns = {}
+        self.load()
+
+    def fresh(self):
+        if not os.path.exists(self.cache_path):
+            return False
+        stat = os.stat(self.csv_path)
+        with open(self.cache_path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, mtime_ns, size, _, _ = HEADER.unpack(header)
+        return magic == MAGIC and mtime_ns == stat.st_mtime_ns and size == stat.st_size
+
+    def load(self):
+        if not self.fresh():
+            build(self.csv_path, self.cache_path, self.memory_bytes)
+        with open(self.cache_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, self.count, length = HEADER.unpack_from(self.data, 0)
+        layout = json.loads(self.data[HEADER.size:HEADER.size + length])
+        self.columns = {entry["name"]: Column(self.data, entry) for entry in layout["columns"]}
+        self.order = None
+        if "order" in layout:
+            self.order = memoryview(self.data)[layout["order"]:layout["order"] + 4 * self.count].cast('I')
+        self.first = layout["columns"][0]["name"] if layout["columns"] else None
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        return self.columns[name]
+
+    def row(self, i, columns=None):
+        return tuple(self.columns[name][i] for name in (columns or self.columns))
+
+    def rows(self, columns=None, sorted_by=None):
+        """Rows as tuples, in file order or stably sorted by one column"""
+        selected = [self.columns[name] for name in (columns or self.columns)]
+        if sorted_by is None:
+            order = range(self.count)
+        elif sorted_by == self.first and self.order is not None:
+            order = self.order
+        else:
+            order = sorted(range(self.count), key=self.columns[sorted_by].codes.__getitem__)
+        # Values are decoded per row rather than whole dictionaries up front
+        for i in order:
+            yield tuple(column[i] for column in selected)
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        if self.order is not None:
+            self.order.release()
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
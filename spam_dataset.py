@@ -0,0 +1,150 @@
+import argparse
+import csv
+import os
+import random
+import time
+
+from bot_config import BotConfig, ConfigFile
+from enhanced_quote_bot import QuoteBot
+from quote_journal import read_quote_file
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COLUMNS = ["text", "base", "caps", "spam_word", "repeat_char", "label"]
+
+
+class VariantGenerator:
+    """Labeled spam-like variants of base messages, the same transforms the bot uses"""
+
+    def __init__(self, base_messages, spam_patterns, caps_chance=0.2, spam_words_chance=0.1,
+                 repeat_chance=0.3, seed=None):
+        self.base_messages = list(base_messages)
+        self.spam_words = spam_patterns['spam_words']
+        self.repeat_chars = spam_patterns['repeat_chars']
+        self.caps_chance = caps_chance
+        self.spam_words_chance = spam_words_chance
+        self.repeat_chance = repeat_chance
+        # NumPy and the fallback draw differently, so the same seed gives
+        # different rows depending on which one is installed
+        if np is not None:
+            self.rng = np.random.default_rng(seed)
+        else:
+            self.rng = random.Random(seed)
+
+    def draws(self, n):
+        """Random choices for n rows: base index, caps flag, word index, char index"""
+        bases, words, chars = len(self.base_messages), len(self.spam_words), len(self.repeat_chars)
+        if np is not None:
+            rng = self.rng
+            base = rng.integers(0, bases, n)
+            caps = rng.random(n) < self.caps_chance
+            # -1 means the transform was not applied
+            word = np.where(rng.random(n) < self.spam_words_chance, rng.integers(0, words, n), -1)
+            char = np.where(rng.random(n) < self.repeat_chance, rng.integers(0, chars, n), -1)
+            return zip(base.tolist(), caps.tolist(), word.tolist(), char.tolist())
+
+        rng = self.rng
+        rows = []
+        for _ in range(n):
+            rows.append((
+                rng.randrange(bases),
+                rng.random() < self.caps_chance,
+                rng.randrange(words) if rng.random() < self.spam_words_chance else -1,
+                rng.randrange(chars) if rng.random() < self.repeat_chance else -1,
+            ))
+        return rows
+
+    def batch(self, n):
+        """n rows as (text, base, caps, spam_word, repeat_char, label) tuples"""
+        base_messages, spam_words, repeat_chars = self.base_messages, self.spam_words, self.repeat_chars
+        rows = []
+        for base_index, caps, word, char in self.draws(n):
+            base = base_messages[base_index]
+            text = base.upper() if caps else base
+            spam_word = spam_words[word] if word >= 0 else ""
+            repeat_char = repeat_chars[char] if char >= 0 else ""
+            if spam_word:
+                text = f"{spam_word} {text}"
+            if repeat_char:
+                text = f"{text}{repeat_char}"
+            label = "spam" if caps or spam_word or repeat_char else "clean"
+            rows.append((text, base, caps, spam_word, repeat_char, label))
+        return rows
+
+    def batches(self, total, batch_size=100_000):
+        while total > 0:
+            n = min(batch_size, total)
+            yield self.batch(n)
+            total -= n
+
+
+def write_csv(batches, path):
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for rows in batches:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def write_parquet(batches, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Writing Parquet needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("text", pa.string()), ("base", pa.string()), ("caps", pa.bool_()),
+        ("spam_word", pa.string()), ("repeat_char", pa.string()), ("label", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(c) for c in columns], schema=schema))
+            count += len(rows)
+    return count
+
+
+def load_settings(config_file):
+    """The bot's chances from config.json, without creating the file"""
+    if os.path.exists(config_file):
+        return ConfigFile(config_file).load()
+    return BotConfig()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate labeled clean/spam-like message variants")
+    parser.add_argument("count", type=int, help="number of rows to generate")
+    parser.add_argument("output", help="output file, .csv or .parquet")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quotes", help="base messages: a JSON list or one per line")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    config = load_settings(args.config)
+    quotes = read_quote_file(args.quotes) if args.quotes else QuoteBot.load_quotes()
+    bases = [config.message_prefix + quote for quote in quotes]
+    generator = VariantGenerator(bases, QuoteBot.load_spam_patterns(), config.caps_chance,
+                                 config.spam_words_chance, seed=args.seed)
+
+    started = time.perf_counter()
+    batches = generator.batches(args.count, args.batch_size)
+    if args.output.endswith('.parquet'):
+        count = write_parquet(batches, args.output)
+    else:
+        count = write_csv(batches, args.output)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {count} rows to {args.output} in {elapsed:.2f}s "
+          f"({count / elapsed * 60:,.0f} rows/min)")
+
+
+if __name__ == "__main__":
+    main()
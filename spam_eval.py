@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+from collections import deque
+
+from bot_config import TEST_MODES
+from enhanced_quote_bot import QuoteBot
+
+LEET = str.maketrans("013457@$", "oieastas")
+NON_WORD = re.compile(r"[^a-z ]+")
+SPACES = re.compile(r" +")
+
+
+def normalize(message, prefix=">>> "):
+    """Fold case, leetspeak, punctuation and prefixes so near-copies share a key"""
+    if message.startswith(prefix):
+        message = message[len(prefix):]
+    text = NON_WORD.sub(" ", message.lower().translate(LEET))
+    return SPACES.sub(" ", text).strip()
+
+
+class RateLimitDetector:
+    """Flag a message when more than max_messages arrive within window seconds"""
+    name = "rate"
+
+    def __init__(self, window=10.0, max_messages=5):
+        self.window = window
+        self.max_messages = max_messages
+        self.times = deque()
+
+    def observe(self, t, message):
+        times = self.times
+        times.append(t)
+        while times[0] <= t - self.window:
+            times.popleft()
+        return len(times) > self.max_messages
+
+
+class RepeatDetector:
+    """Flag a message seen more than max_repeats times within window seconds"""
+    name = "repeat"
+
+    def __init__(self, window=60.0, max_repeats=2):
+        self.window = window
+        self.max_repeats = max_repeats
+        self.recent = deque()
+        self.counts = {}
+
+    def key(self, message):
+        return message
+
+    def observe(self, t, message):
+        key = self.key(message)
+        recent, counts = self.recent, self.counts
+        recent.append((t, key))
+        counts[key] = counts.get(key, 0) + 1
+        # Every message is appended and expired once: O(1) amortized
+        while recent[0][0] <= t - self.window:
+            _, old = recent.popleft()
+            left = counts[old] - 1
+            if left:
+                counts[old] = left
+            else:
+                del counts[old]
+        return counts[key] > self.max_repeats
+
+
+class SimilarityDetector(RepeatDetector):
+    """Like RepeatDetector, but counts messages that match after normalization"""
+    name = "similar"
+
+    def key(self, message):
+        return normalize(message)
+
+
+class AnyDetector:
+    """Flag when any of the given detectors flags"""
+    name = "any"
+
+    def __init__(self, detectors):
+        self.detectors = detectors
+
+    def observe(self, t, message):
+        flagged = False
+        for detector in self.detectors:
+            # Every detector must still see the message to keep its window current
+            flagged = detector.observe(t, message) or flagged
+        return flagged
+
+
+def default_detectors():
+    return {
+        "rate": lambda: RateLimitDetector(),
+        "repeat": lambda: RepeatDetector(),
+        "similar": lambda: SimilarityDetector(),
+        "any": lambda: AnyDetector([RateLimitDetector(), RepeatDetector(), SimilarityDetector()]),
+    }
+
+
+def is_spam(event):
+    """Ground truth: everything except plain messages in normal pacing is spam"""
+    return event.get("kind", event.get("mode")) != "normal"
+
+
+class Score:
+    def __init__(self):
+        self.tp = self.fp = self.fn = self.tn = 0
+        self.latencies = []
+
+    def to_dict(self):
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        latency = sum(self.latencies) / len(self.latencies) if self.latencies else None
+        return {"tp": self.tp, "fp": self.fp, "fn": self.fn, "tn": self.tn,
+                "precision": round(precision, 4), "recall": round(recall, 4),
+                "runs_detected": len(self.latencies),
+                "mean_detection_latency": None if latency is None else round(latency, 3)}
+
+
+def evaluate(runs, factories=None):
+    """Score detectors per mode; runs are lists of timeline events, one list per run"""
+    factories = factories or default_detectors()
+    scores = {}
+    events_seen = 0
+    for events in runs:
+        detectors = {name: factory() for name, factory in factories.items()}
+        first_spam = {}
+        detected = {}
+        mode = None
+        for event in events:
+            if event["event"] == "start":
+                mode = event["mode"]
+            if event["event"] != "send" or not event.get("ok", True):
+                continue
+            events_seen += 1
+            mode = event["mode"]
+            t, message, spam = event["t"], event["message"], is_spam(event)
+            for name, detector in detectors.items():
+                flagged = detector.observe(t, message)
+                score = scores.setdefault((mode, name), Score())
+                if spam:
+                    first_spam.setdefault(name, t)
+                    if flagged:
+                        score.tp += 1
+                        if name not in detected:
+                            # Time from the first spam message to the first catch
+                            detected[name] = t - first_spam[name]
+                            score.latencies.append(detected[name])
+                    else:
+                        score.fn += 1
+                elif flagged:
+                    score.fp += 1
+                else:
+                    score.tn += 1
+
+    report = {}
+    for (mode, name), score in scores.items():
+        report.setdefault(mode, {})[name] = score.to_dict()
+    return report, events_seen
+
+
+def read_timeline(path):
+    """Events of a JSONL timeline, split into runs at each start event"""
+    runs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            event = json.loads(line)
+            if event["event"] == "start" or not runs:
+                runs.append([])
+            runs[-1].append(event)
+    return runs
+
+
+def simulate(modes, runs_per_mode=3, config_file='config.json'):
+    """Timelines from the bot's own dry runs, without any chat service"""
+    bot = QuoteBot(config_file)
+    bot.close_logging()
+    bot.config = bot.config.replace(log_messages=False, print_messages=False, metrics_file=None)
+    runs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for mode in modes:
+            for _ in range(runs_per_mode):
+                runs.append(bot.dry_run(mode).events)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure spam detectors against bot timelines")
+    parser.add_argument("timelines", nargs="*", help="JSONL timelines; simulated when omitted")
+    parser.add_argument("--runs", type=int, default=3, help="simulated runs per mode")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.timelines:
+        runs = [run for path in args.timelines for run in read_timeline(path)]
+    else:
+        runs = simulate(TEST_MODES, args.runs)
+
+    started = time.perf_counter()
+    report, events = evaluate(runs)
+    elapsed = time.perf_counter() - started
+
+    for mode, detectors in report.items():
+        print(f"\n=== {mode} ===")
+        for name, result in detectors.items():
+            latency = result["mean_detection_latency"]
+            latency = "-" if latency is None else f"{latency}s"
+            print(f"  {name:8} precision {result['precision']:.2f}  recall {result['recall']:.2f}  "
+                  f"false positives {result['fp']}  latency {latency}")
+    print(f"\n{events} events in {elapsed:.3f}s ({events / max(elapsed, 1e-9) * 60:,.0f} events/min)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
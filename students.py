@@ -1,10 +1,54 @@
+import argparse
 import csv
+import os
+import sys
+from itertools import islice
+from operator import itemgetter
 
-students = []
+from external_sort import row_size, sort_rows
+from roster_cache import RosterCache
 
-with open("students.csv") as file:
-    for row in csv.DictReader(file):
-        students.append({"name": row["name"], "place": row["place"]})
 
-for student in sorted(students, key=lambda student: student["name"]):
-    print(f"{student["name"]} lives in {student["place"]}")
\ No newline at end of file
+def read_students(path):
+    # Plain (name, place) tuples, parsed one row at a time
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        name, place = header.index("name"), header.index("place")
+        for row in reader:
+            yield row[name], row[place]
+
+
+def estimated_memory(path, sample_rows=1000):
+    """Bytes the roster takes as rows in memory, by external_sort's count, scaled up from its first rows"""
+    with open(path, "rb") as file:
+        lines = list(islice(file, sample_rows + 1))
+    sampled = sum(map(len, lines[1:]))
+    if not sampled:
+        return 0
+    reader = csv.reader(line.decode("utf-8", "replace") for line in lines)
+    header = next(reader)
+    name, place = header.index("name"), header.index("place")
+    used = sum(row_size((row[name], row[place])) for row in reader)
+    return used * os.path.getsize(path) // sampled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List students sorted by name")
+    parser.add_argument("path", nargs="?", default="students.csv")
+    parser.add_argument("--memory-mb", type=float, default=64,
+                        help="rosters that fit in this much memory use the cache; larger ones are merge-sorted through disk")
+    args = parser.parse_args()
+
+    memory_bytes = int(args.memory_mb * 1024 * 1024)
+    if estimated_memory(args.path) <= memory_bytes:
+        # Parsed once into a binary cache next to the CSV, already sorted by name
+        with RosterCache(args.path, memory_bytes=memory_bytes) as cache:
+            students = cache.rows(("name", "place"), sorted_by="name")
+            sys.stdout.writelines(f"{name} lives in {place}\n" for name, place in students)
+    else:
+        students = sort_rows(read_students(args.path), key=itemgetter(0), memory_bytes=memory_bytes)
+        sys.stdout.writelines(f"{name} lives in {place}\n" for name, place in students)
+
+
+main()
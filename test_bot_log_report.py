@@ -0,0 +1,27 @@
+import random
+
+from bot_log_report import analyze
+
+
+def write_log(path, runs, seed=0):
+    """A log from before start and stop lines were written: runs end with Ctrl+C"""
+    rng = random.Random(seed)
+    t = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(runs):
+            for i in range(1, rng.randrange(2, 6)):
+                t += rng.randrange(1, 3000)
+                stamp = f"2024-01-01 {t // 3_600_000 % 24:02d}:{t // 60_000 % 60:02d}:{t // 1000 % 60:02d},{t % 1000:03d}"
+                f.write(f"{stamp} - INFO - Sent message {i}/10: some quote...\n")
+                if rng.random() < 0.1:
+                    f.write(f"{stamp} - ERROR - Error sending message: boom\n")
+            f.write(f"{stamp} - INFO - Bot stopped by user\n")
+
+
+def test_chunked_parse_matches_serial(tmp_path):
+    path = str(tmp_path / 'quote_bot.log')
+    write_log(path, 300)
+    serial = analyze([path], workers=1).to_dict()
+    assert serial["stops"] == {"interrupted": 300}
+    for chunk_bytes in (97, 500, 4096):
+        assert analyze([path], workers=1, chunk_bytes=chunk_bytes).to_dict() == serial
@@ -0,0 +1,25 @@
+from quote_journal import QuoteJournal, QuoteStore
+
+
+def test_appends_after_a_torn_line_survive_a_reload(tmp_path):
+    journal = QuoteJournal(str(tmp_path / 'quotes.journal'))
+    journal.append_many([('add', 'first'), ('add', 'second')])
+    # A crash mid-append: half a line, no newline, cut inside a character
+    with open(journal.path, 'ab') as f:
+        f.write('{"op": "add", "quote": "toré'.encode('utf-8')[:-1])
+
+    store = QuoteStore(['base'], base_name=str(tmp_path / 'quotes'), journal=journal)
+    store.append('third')
+    store.remove('first')
+    store.append('fourth')
+
+    reloaded = QuoteStore(['base'], base_name=str(tmp_path / 'quotes'), journal=journal)
+    assert list(reloaded) == ['base', 'first', 'second', 'third', 'fourth']
+    assert [q for i, q in enumerate(reloaded) if reloaded.is_live(i)] == ['base', 'second', 'third', 'fourth']
+
+
+def test_replay_skips_a_bad_line_in_the_middle(tmp_path):
+    journal = QuoteJournal(str(tmp_path / 'quotes.journal'))
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.write('{"op": "add", "quote": "a"}\n{"op": "ad\n{"op": "add", "quote": "b"}\n')
+    assert list(journal.replay()) == [('add', 'a'), ('add', 'b')]
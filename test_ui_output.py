@@ -0,0 +1,69 @@
+import random
+
+from ui_output import BatchedOutput, OutputBuffer
+
+
+class FakeText:
+    """Just enough of a Tk Text widget: whole-line deletes from the head, appends at the end"""
+
+    def __init__(self):
+        self.content = ''
+
+    def delete(self, start, end):
+        if end == "end":
+            self.content = ''
+            return
+        lines = int(end.split('.')[0]) - 1
+        self.content = self.content.split('\n', lines)[-1]
+
+    def insert(self, index, text):
+        self.content += text
+
+    def see(self, index):
+        pass
+
+
+def make_output(max_lines):
+    widget = FakeText()
+    output = BatchedOutput(widget, lambda ms, fn: None, max_lines=max_lines)
+    return widget, output
+
+
+def test_take_trims_existing_lines():
+    buffer = OutputBuffer(max_lines=3)
+    buffer.write("a\nb\n")
+    assert buffer.take() == (0, "a\nb\n", False)
+    buffer.write("c\nd\n")
+    assert buffer.take() == (1, "c\nd\n", False)
+
+
+def test_burst_larger_than_shown_lines_replaces():
+    widget, output = make_output(50)
+    output.write(''.join(f"{i}\n" for i in range(10)))
+    output.flush()
+    output.write(''.join(f"x{i}\n" for i in range(55)))
+    output.flush()
+    assert widget.content == ''.join(f"x{i}\n" for i in range(5, 55))
+    assert output.buffer.shown == 50
+
+
+def test_widget_matches_buffer_under_random_writes():
+    rng = random.Random(0)
+    widget, output = make_output(50)
+    for _ in range(2000):
+        for _ in range(rng.randrange(1, 4)):
+            lines = rng.choice([0, 1, 3, 20, 60])
+            output.write(''.join(f"{rng.random()}\n" for _ in range(lines)) + rng.choice(['', 'partial']))
+        output.flush()
+        assert widget.content == output.buffer.text()
+        assert widget.content.count('\n') <= 50
+
+
+def test_clear_empties_widget():
+    widget, output = make_output(5)
+    output.write("a\nb\n")
+    output.flush()
+    output.clear()
+    output.write("c\n")
+    output.flush()
+    assert widget.content == "c\n"
@@ -0,0 +1,85 @@
+from collections import deque
+
+
+class OutputBuffer:
+    """The last max_lines lines of output, plus writes not yet shown
+
+    Knows nothing about Tk: take() says what to delete from the head of the
+    widget and what to append, so it can be driven and checked headlessly.
+    """
+
+    def __init__(self, max_lines=1000):
+        self.max_lines = max_lines
+        self.lines = deque(maxlen=max_lines)
+        self.tail = ''
+        self.shown = 0
+        self.pending = []
+
+    def write(self, text):
+        """Queue text; True when it is the first write since the last take()"""
+        self.pending.append(text)
+        return len(self.pending) == 1
+
+    def text(self):
+        """Everything retained, as the widget should show it"""
+        return ''.join(line + '\n' for line in self.lines) + self.tail
+
+    def take(self):
+        """(lines to trim from the head, text to append, replace everything)"""
+        text = ''.join(self.pending)
+        self.pending.clear()
+        if not text:
+            return 0, '', False
+
+        parts = (self.tail + text).split('\n')
+        self.tail = parts.pop()
+        self.lines.extend(parts)
+
+        shown = self.shown
+        total = shown + len(parts)
+        trim = max(0, total - self.max_lines)
+        self.shown = min(total, self.max_lines)
+        if trim > shown:
+            # More new lines than fit: show the retained ones instead of
+            # inserting text that would be trimmed straight away
+            return 0, self.text(), True
+        return trim, text, False
+
+    def clear(self):
+        self.lines.clear()
+        self.tail = ''
+        self.shown = 0
+        self.pending.clear()
+
+
+class BatchedOutput:
+    """Coalesce writes to a text widget into one insert per frame via after()"""
+
+    def __init__(self, widget, after, max_lines=1000, interval_ms=16):
+        self.widget = widget
+        self.after = after
+        self.interval_ms = interval_ms
+        self.buffer = OutputBuffer(max_lines)
+        self.scheduled = False
+
+    def write(self, text):
+        if self.buffer.write(text) and not self.scheduled:
+            self.scheduled = True
+            self.after(self.interval_ms, self.flush)
+
+    def flush(self):
+        self.scheduled = False
+        trim, text, replace = self.buffer.take()
+        if not text:
+            return
+        widget = self.widget
+        if replace:
+            widget.delete("1.0", "end")
+        elif trim:
+            widget.delete("1.0", f"{trim + 1}.0")
+        widget.insert("end", text)
+        widget.see("end")  # Auto-scroll to bottom
+
+    def clear(self):
+        self.buffer.clear()
+        self.widget.delete("1.0", "end")
@@ -0,0 +1,134 @@
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+_local = threading.local()
+
+
+def current_task():
+    """The Task running on this worker thread, or None outside one"""
+    return getattr(_local, 'task', None)
+
+
+class Task:
+    """Handle for work submitted to a TaskRunner"""
+
+    def __init__(self, runner, name, on_done, on_error, on_progress):
+        self.runner = runner
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """Drop the task if it hasn't started; a running one sees cancelled() turn True"""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report(self, fraction=None, text=''):
+        """Progress from the worker; fraction 0-1, or None when unknown"""
+        self.runner.results.put((self, 'progress', (fraction, text)))
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+def _run(task, fn, args, kwargs):
+    _local.task = task
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.task = None
+
+
+class TaskRunner:
+    """Run work off the Tk mainloop and hand results back to it
+
+    Workers never touch widgets: results, errors and progress go through a
+    queue that after() drains on the mainloop, only while tasks are active.
+    """
+
+    def __init__(self, after, workers=4, executor=None, poll_ms=30, max_per_poll=200):
+        self.after = after
+        # A ProcessPoolExecutor works too, without progress or current_task()
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-task")
+        self.threads = executor is None or isinstance(executor, ThreadPoolExecutor)
+        self.poll_ms = poll_ms
+        self.max_per_poll = max_per_poll
+        self.results = queue.Queue()
+        self.active = set()
+        self.polling = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, name=None, **kwargs):
+        """Run fn(*args, **kwargs) on a worker; callbacks run on the mainloop"""
+        task = Task(self, name or getattr(fn, '__name__', 'task'), on_done, on_error, on_progress)
+        if self.threads:
+            task.future = self.executor.submit(_run, task, fn, args, kwargs)
+        else:
+            task.future = self.executor.submit(fn, *args, **kwargs)
+        self.active.add(task)
+        task.future.add_done_callback(lambda future: self.results.put((task, 'finished', None)))
+        if not self.polling:
+            self.polling = True
+            self.after(self.poll_ms, self.poll)
+        return task
+
+    def poll(self):
+        """Deliver queued results on the mainloop; stops rescheduling when idle"""
+        try:
+            self.deliver()
+        finally:
+            # Rescheduled even if a callback raised, so later results still arrive
+            if self.active or not self.results.empty():
+                self.after(self.poll_ms, self.poll)
+            else:
+                self.polling = False
+
+    def deliver(self):
+        progress = {}
+        for _ in range(self.max_per_poll):
+            try:
+                task, kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                # Only the latest report per task is worth drawing
+                progress[task] = value
+                continue
+            progress.pop(task, None)
+            self.active.discard(task)
+            self.finish(task)
+
+        for task, (fraction, text) in progress.items():
+            if task.on_progress and not task.cancelled():
+                task.on_progress(fraction, text)
+
+    def finish(self, task):
+        future = task.future
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            if task.on_error:
+                task.on_error(e)
+            return
+        if task.cancelled():
+            return
+        if task.on_done:
+            task.on_done(result)
+
+    def cancel_all(self):
+        for task in list(self.active):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and let the workers go without waiting"""
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from bot_metrics import LatencyHistogram
+
+
+class UiMonitor:
+    """Opt-in mainloop responsiveness tracing for a Tk window
+
+    A heartbeat scheduled with after() every interval_ms measures how late
+    the mainloop gets to it. Wrapped callbacks are timed by name, and
+    anything slower than stall_ms is reported as a stall. write() saves a
+    Chrome trace (chrome://tracing, Perfetto) with a summary alongside.
+    """
+
+    def __init__(self, after, interval_ms=50, stall_ms=100, trace_file=None, max_events=100_000,
+                 clock=time.perf_counter):
+        self.tk_after = after
+        self.interval_ms = interval_ms
+        self.stall = stall_ms / 1000
+        self.trace_file = trace_file
+        self.clock = clock
+        self.started = clock()
+        self.events = deque(maxlen=max_events)
+        self.lag = LatencyHistogram()
+        self.callbacks = {}
+        self.spans = {}
+        self.stalls = deque(maxlen=50)
+        self.stall_count = 0
+        self.running = None
+        self.running_time = 0.0
+        self.expected = None
+        self.listeners = []
+
+    def micros(self, t):
+        return round((t - self.started) * 1_000_000)
+
+    def start(self):
+        self.expected = self.clock() + self.interval_ms / 1000
+        self.tk_after(self.interval_ms, self.beat)
+
+    def beat(self):
+        now = self.clock()
+        lag = max(now - self.expected, 0.0)
+        self.lag.record(lag)
+        self.events.append({"name": "lag_ms", "ph": "C", "ts": self.micros(now), "pid": 0,
+                            "args": {"lag_ms": round(lag * 1000, 3)}})
+        # Callbacks over the threshold were reported already; this catches the rest
+        if lag > self.stall and self.running_time <= self.stall:
+            self.report_stall("mainloop", lag, now)
+        self.running, self.running_time = None, 0.0
+        for listener in self.listeners:
+            listener(self)
+        self.expected = self.clock() + self.interval_ms / 1000
+        self.tk_after(self.interval_ms, self.beat)
+
+    def report_stall(self, name, seconds, now):
+        self.stall_count += 1
+        # A late heartbeat is blamed on the slowest callback that ran since the last one
+        culprit = (self.running or "untimed work") if name == "mainloop" else name
+        stall = {"at_ms": round((now - self.started) * 1000, 1), "ms": round(seconds * 1000, 1),
+                 "callback": culprit}
+        self.stalls.append(stall)
+        self.events.append({"name": f"stall: {culprit}", "ph": "i", "s": "g", "ts": self.micros(now),
+                            "pid": 0, "args": stall})
+
+    def record(self, name, started, finished):
+        seconds = finished - started
+        histogram = self.callbacks.get(name)
+        if histogram is None:
+            histogram = self.callbacks[name] = LatencyHistogram()
+        histogram.record(seconds)
+        self.events.append({"name": name, "ph": "X", "ts": self.micros(started),
+                            "dur": round(seconds * 1_000_000), "pid": 0, "tid": 0})
+        if seconds > self.running_time:
+            self.running, self.running_time = name, seconds
+        if seconds > self.stall:
+            self.report_stall(name, seconds, finished)
+
+    def wrap(self, fn, name=None):
+        """fn, timed under name every time it runs"""
+        name = name or getattr(fn, '__qualname__', getattr(fn, '__name__', 'callback'))
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            started = self.clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, started, self.clock())
+        return timed
+
+    def after(self, ms, fn, *args):
+        """Like root.after(), with the callback timed"""
+        return self.tk_after(ms, self.wrap(fn), *args)
+
+    @contextmanager
+    def span(self, name):
+        """Time a one-off phase such as startup"""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            finished = self.clock()
+            self.spans[name] = round((finished - started) * 1000, 3)
+            self.events.append({"name": name, "ph": "X", "ts": self.micros(started),
+                                "dur": round((finished - started) * 1_000_000), "pid": 0, "tid": 0})
+
+    def summary(self):
+        ms = lambda stats: {k: round(v * 1000, 3) if k != "count" else v for k, v in stats.items()}
+        return {
+            "spans_ms": dict(self.spans),
+            "heartbeat_lag_ms": ms(self.lag.summary()),
+            "callbacks_ms": {name: ms(h.summary()) for name, h in self.callbacks.items()},
+            "stall_threshold_ms": self.stall * 1000,
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+    def overlay_text(self):
+        lag = self.lag
+        return (f"lag p50 {lag.percentile(50) * 1000:.1f}ms  p99 {lag.percentile(99) * 1000:.1f}ms  "
+                f"stalls {self.stall_count}")
+
+    def write(self, path=None):
+        """Save the trace and summary as JSON, atomically"""
+        path = path or self.trace_file
+        if not path:
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                       "summary": self.summary()}, f)
+        os.replace(tmp_path, path)